@@ -1,6 +1,11 @@
+import os
+from typing import Dict, Tuple
+import zlib
+
 from app    import app
 from flask  import jsonify, request, Response
 from flask_cors import CORS, cross_origin
+from prometheus_client import CONTENT_TYPE_LATEST
 
 from networkbuilder import NetworkBuilder, LOGGER
 from queryParams import QueryParams
@@ -9,34 +14,155 @@ nb = NetworkBuilder()
 from networkSignature import NetworkSignature
 ns = NetworkSignature()
 
+from responseCache import ENCODINGS, CachedResponse, ResponseCache
+response_cache = ResponseCache(maxsize=int(os.environ.get('RESPONSE_CACHE_SIZE', 128)),
+                               ttl=float(os.environ.get('RESPONSE_CACHE_TTL', 600)),
+                               max_bytes=int(os.environ.get('RESPONSE_CACHE_MAX_BYTES', 256*1024*1024)),
+                               max_entry_bytes=int(os.environ.get('RESPONSE_CACHE_MAX_ENTRY_BYTES', 16*1024*1024)))
+
+from singleFlight import SingleFlight
+import instrumentation
+single_flight = SingleFlight()
+
+
+def requestData(multiple: Tuple[str, ...] = ()) -> Dict:
+    '''
+    Parameters of a POST request from its JSON body, or of a GET request from its query string.
+    A repeated GET parameter is kept as a list only if named in multiple, otherwise its first value is used.
+    '''
+    if request.method == "POST":
+        return request.json
+    data = request.args.to_dict(flat=False)
+    return dict((k, v if k in multiple else v[0]) for k, v in data.items())
+
+
+def cachedResponse(name: str, opts: QueryParams, compute, mimetype: str) -> Response:
+    '''
+    Return a cached response for the query, or compute and cache it.
+    Conditional GET requests with a matching If-None-Match get a 304 reply.
+    Responses with timings are computed for each request.
+    '''
+    if opts.timings:
+        return entryResponse(CachedResponse.fromBody(compute(), mimetype))
+
+    key = '{}:{}'.format(name, opts.cacheKey())
+    entry = response_cache.get(key)
+    if entry is None:
+        #   identical requests in flight share one computation
+        entry = single_flight.do(key, lambda: response_cache.get(key) or response_cache.set(key, compute(), mimetype))
+    else:
+        LOGGER.debug("Response cache hit for {}".format(name))
+
+    return entryResponse(entry)
+
+
+COMPRESS_MIN_BYTES = int(os.environ.get('COMPRESS_MIN_BYTES', 1024))
+
+
+def entryResponse(entry) -> Response:
+    '''
+    Response of a cache entry, compressed with the best content encoding accepted by the client
+    '''
+    encoding = None
+    if len(entry.body) >= COMPRESS_MIN_BYTES:
+        encoding = request.accept_encodings.best_match(ENCODINGS)
+    etag = entry.etag if encoding is None else '{}-{}'.format(entry.etag, encoding)
+
+    if request.method in ('GET', 'HEAD') and etag in request.if_none_match:
+        response = Response(status=304)
+    else:
+        response = Response(entry.body if encoding is None else response_cache.encode(entry, encoding), mimetype=entry.mimetype)
+    if encoding is not None:
+        response.headers['Content-Encoding'] = encoding
+
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    response.vary.add('Accept-Encoding')
+    return response
+
+
+STREAM_CACHE_MAX_BYTES = int(os.environ.get('STREAM_CACHE_MAX_BYTES', 8*1024*1024))
+
+
+def streamedResponse(name: str, opts: QueryParams, compute, mimetype: str) -> Response:
+    '''
+    Return a cached response for the query, or stream the text chunks returned by compute.
+    A streamed body up to STREAM_CACHE_MAX_BYTES is cached once it has been sent.
+    '''
+    key = '{}:{}'.format(name, opts.cacheKey())
+    entry = response_cache.get(key)
+    if entry is not None:
+        LOGGER.debug("Response cache hit for {}".format(name))
+        return entryResponse(entry)
+
+    #   the graph is built here, so that errors are reported before the response starts
+    chunks = compute()
+
+    #   streams are compressed on the fly with gzip only
+    gzipped = request.accept_encodings.best_match(['gzip']) is not None
+
+    def generate():
+        buffer, size = [], 0
+        compressor = zlib.compressobj(6, zlib.DEFLATED, 31) if gzipped else None
+        for chunk in chunks:
+            data = chunk.encode('utf-8')
+            if buffer is not None:
+                size += len(data)
+                if size <= STREAM_CACHE_MAX_BYTES:
+                    buffer.append(data)
+                else:
+                    buffer = None
+            if compressor is not None:
+                data = compressor.compress(data)
+            if data:
+                yield data
+        if compressor is not None:
+            yield compressor.flush()
+        if buffer is not None:
+            response_cache.set(key, b''.join(buffer), mimetype)
+
+    response = Response(generate(), mimetype=mimetype)
+    if gzipped:
+        response.headers['Content-Encoding'] = 'gzip'
+    response.headers['Cache-Control'] = 'no-cache'
+    response.vary.add('Accept-Encoding')
+    return response
+
+
+STREAMED_MIMETYPES = {NetworkBuilder.GRAPHML: 'text/xml',
+                      NetworkBuilder.GEXF: 'application/gexf+xml',
+                      NetworkBuilder.CSV: 'text/csv'}
+
 
 @app.route('/')
 @app.route('/query', methods=['GET', 'POST'])
 def queryGraph():
-    if request.method == "POST":
-        data = request.json
-    else:
-        data = request.args.to_dict(flat=False)
+    data = requestData()
     
-    res = None
-
     try:
-        res = nb.query(QueryParams(**data))
+        opts = QueryParams(**data)
+        if opts.format == NetworkBuilder.BINARY:
+            response = cachedResponse('query', opts,
+                                      lambda: nb.query(opts),
+                                      'application/octet-stream')
+        elif opts.format in NetworkBuilder.STREAMED_FORMATS:
+            response = streamedResponse('query', opts,
+                                        lambda: nb.query(opts),
+                                        STREAMED_MIMETYPES[opts.format])
+        else:
+            response = cachedResponse('query', opts,
+                                      lambda: nb.query(opts, encoded=True),
+                                      'application/json')
     
     except Exception as e:
         return Response({'error: {}'.format(str(e))}, status=403, mimetype='application/json')
     
-    response = jsonify(res)
-    
     return response
 
 @app.route('/')
 @app.route('/query_ego', methods=['GET', 'POST'])
 def queryGraphEgo():
-    if request.method == "POST":
-        data = request.json
-    else:
-        data = request.args.to_dict(flat=False)
+    data = requestData()
     
     res = None
 
@@ -50,46 +176,89 @@ def queryGraphEgo():
     
     return response
 
+@app.route('/query_batch', methods=['GET', 'POST'])
+def queryGraphBatch():
+    '''
+    Egocentric networks of several ids, given as a list or a space separated string in 'ids'
+    '''
+    #   'ids' may be repeated in a GET request
+    data = requestData(multiple=('ids',))
+
+    try:
+        ids = data.pop('ids')
+        if isinstance(ids, str):
+            ids = [ids]
+        ids = list(dict.fromkeys(i for v in ids for i in v.split()))
+
+        opts = QueryParams(**data)
+        response = cachedResponse('query_batch:{}'.format(' '.join(ids)), opts,
+                                  lambda: nb.query_batch(opts, ids, encoded=True),
+                                  'application/json')
+
+    except Exception as e:
+        return Response({'error: {}'.format(str(e))}, status=403, mimetype='application/json')
+
+    return response
+
 @app.route('/')
 @app.route('/graphml', methods=['GET', 'POST'])
 def queryGraphML():
-    if request.method == "POST":
-        data = request.json
-    else:
-        data = request.args.to_dict(flat=False)
+    data = requestData()
     
     try:
         dct = {**data, **{'format':NetworkBuilder.GRAPHML}}
         LOGGER.debug("{}".format(dct))
-        res = nb.query(QueryParams(**dct))
+        opts = QueryParams(**dct)
+        response = streamedResponse('graphml', opts,
+                                    lambda: nb.query(opts),
+                                    'text/xml')
     
     except Exception as e: #    mimetype='text/xml')
         return Response({'error: {}'.format(str(e))}, status=403, mimetype='text/xml')
     
-    response = Response(res, mimetype='text/xml')
-    
     return response
 
 
 @app.route('/')
 @app.route('/signature', methods=['GET', 'POST'])
 def querySignature():
-    if request.method == "POST":
-        data = request.json
-    else:
-        data = request.args.to_dict(flat=False)
+    data = requestData()
 
     try:
-        res = ns.query(QueryParams(**data))
+        opts = QueryParams(**data)
+        response = cachedResponse('signature', opts,
+                                  lambda: jsonify(ns.query(opts)).get_data(),
+                                  'application/json')
     except Exception as e:
         return Response({'error: {}'.format(str(e))}, status=403, mimetype='text/xml')
     
-    return jsonify(res)
+    return response
 
 @app.route('/health')
 def health_check():
     return 'OK', 200
 
+@app.route('/metrics')
+def prometheus_metrics():
+    '''
+    Request, stage and size histograms of all worker processes
+    '''
+    return Response(instrumentation.exposition(), content_type=CONTENT_TYPE_LATEST)
+
+@app.before_request
+def begin_request_record():
+    instrumentation.begin(request.endpoint)
+
+@app.after_request
+def record_response_size(response):
+    if not response.is_streamed and response.status_code == 200 and request.endpoint != 'prometheus_metrics':
+        instrumentation.observeSize('bytes', response.content_length or 0)
+    return response
+
+@app.teardown_request
+def end_request_record(exc):
+    instrumentation.end()
+
 @app.after_request
 def add_cors_headers(response):
     response.headers.add('Access-Control-Allow-Origin', '*')
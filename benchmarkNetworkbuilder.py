@@ -0,0 +1,186 @@
+'''
+Created on 18.10.2026
+# coding: utf-8
+
+Stage-level benchmarks of the network builder against a local fake SPARQL endpoint
+serving synthetic EMLO-shaped results, see fakeSparqlEndpoint.py. The SPARQL result
+cache is disabled, so that the fetch stages include the HTTP round trips.
+
+example to run at three sizes and compare to an earlier run:
+python benchmarkNetworkbuilder.py --sizes 1000 10000 50000 --output bench.json --compare bench_old.json
+'''
+
+import argparse
+import datetime
+import json
+import logging
+import os
+import platform
+import statistics
+import sys
+import time
+from typing import Callable, Dict, List
+
+os.environ['SPARQL_CACHE_PATH'] = ''
+
+import networkx as nx
+import numpy as np
+
+from fakeSparqlEndpoint import EmloData, FakeSparqlEndpoint, emloQueries
+import layout
+import metricPool
+from networkbuilder import NetworkBuilder
+from queryParams import QueryParams
+
+LOGGER = logging.getLogger(__name__)
+
+def measure(fn: Callable, repeats: int, setup: Callable = None) -> Dict:
+    '''
+    Run fn repeats times, with the result of setup as its argument if given, and return the durations
+    '''
+    seconds, res = [], None
+    for _ in range(repeats):
+        args = (setup(),) if setup else ()
+        t0 = time.perf_counter()
+        res = fn(*args)
+        seconds.append(time.perf_counter()-t0)
+    return {'seconds': seconds,
+            'min': min(seconds),
+            'median': statistics.median(seconds),
+            'result': res}
+
+
+def benchmark(size: int, opts: argparse.Namespace) -> List[Dict]:
+    '''
+    Benchmark the stages with a synthetic network of size links
+    '''
+    data = EmloData(links=size, seed=opts.seed)
+    nb = NetworkBuilder()
+    results = []
+
+    def record(stage: str, res: Dict, **sizes) -> None:
+        LOGGER.info("{:>8} links {:<22} median {:.4f} s".format(size, stage, res['median']))
+        results.append({'links': size, 'stage': stage,
+                        'seconds': res['seconds'], 'min': res['min'], 'median': res['median'], **sizes})
+
+    with FakeSparqlEndpoint(data) as endpoint:
+        params = dict(endpoint=endpoint.url,
+                      **emloQueries(),
+                      optimize=opts.optimize,
+                      log_level=logging.WARNING)
+        ego_opts = QueryParams(**params, id=data.ids[0], limit=opts.limit)
+        socio_opts = QueryParams(**params, limit=size)
+
+        res = measure(lambda: nb.egocentric(ego_opts), opts.repeats)
+        nodes, links = res['result']
+        record('egocentric', res, rows=len(links), nodes=len(nodes))
+
+        res = measure(lambda: nb.sociocentric(socio_opts), opts.repeats)
+        nodes, links = res['result']
+        record('sociocentric', res, rows=len(links), nodes=len(nodes))
+
+        def build():
+            return nb.generateGraph([{'id': n} for n in nodes], links, socio_opts)
+
+        res = measure(build, opts.repeats)
+        G = res['result']
+        record('generateGraph', res, nodes=G.number_of_nodes(), edges=G.number_of_edges())
+
+        res = measure(lambda G: nb.densifyGraph(G, socio_opts), opts.repeats, setup=build)
+        G = build()
+        nb.densifyGraph(G, socio_opts)
+        record('densifyGraph', res, nodes=G.number_of_nodes(), edges=G.number_of_edges())
+
+        #   start the metric pool outside the measurements
+        metricPool.METRIC_POOL.submit(len, []).result()
+
+        def details():
+            #   no pagerank warm starts from the earlier repeats
+            metricPool.PAGERANK_CACHE = metricPool.PageRankCache()
+            return nb.getGraphDetails(G, socio_opts)
+
+        res = measure(details, opts.repeats)
+        node_data, metrics = res['result']
+        record('getGraphDetails', res, nodes=G.number_of_nodes(), edges=G.number_of_edges())
+
+        res = measure(lambda Gx: nb.adjustPositions(Gx, iterations=opts.layout_iterations), opts.repeats,
+                      setup=G.to_networkx)
+        record('adjustPositions', res, nodes=G.number_of_nodes())
+
+        for fmt, encoded in ((NetworkBuilder.CYTOSCAPE, False), (NetworkBuilder.CYTOSCAPE, True),
+                             (NetworkBuilder.GRAPHML, False), (NetworkBuilder.BINARY, False)):
+            format_opts = QueryParams(**params, limit=size, format=fmt)
+
+            def serialize():
+                out = nb.formatGraph(G, node_data, metrics, format_opts, encoded)
+                if fmt == NetworkBuilder.GRAPHML:
+                    out = ''.join(out).encode('utf-8')
+                elif not encoded and fmt == NetworkBuilder.CYTOSCAPE:
+                    out = json.dumps(out).encode('utf-8')
+                return len(out)
+
+            res = measure(serialize, opts.repeats)
+            record('serialize_{}{}'.format(fmt, '_encoded' if encoded else ''), res, bytes=res['result'])
+
+        LOGGER.debug("{} queries served".format(endpoint.queries))
+
+    return results
+
+
+def compare(results: List[Dict], file: str) -> None:
+    '''
+    Print the median durations relative to an earlier result file
+    '''
+    with open(file) as f:
+        earlier = dict(((r['links'], r['stage']), r) for r in json.load(f)['results'])
+
+    print('{:>8} {:<30} {:>10} {:>10} {:>7}'.format('links', 'stage', 'earlier', 'now', 'ratio'))
+    for r in results:
+        e = earlier.get((r['links'], r['stage']))
+        if e:
+            print('{:>8} {:<30} {:>10.4f} {:>10.4f} {:>7.2f}'.format(r['links'], r['stage'], e['median'],
+                                                                    r['median'], r['median']/e['median']))
+
+
+def main(args):
+    parser = argparse.ArgumentParser(description='Benchmark the network builder stages')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000],
+                        help='Numbers of links in the synthetic networks')
+    parser.add_argument('--repeats', type=int, default=3, help='Repeats per stage')
+    parser.add_argument('--limit', type=int, default=1000, help='Limit of the egocentric query')
+    parser.add_argument('--optimize', type=float, default=1.5, help='Optimize')
+    parser.add_argument('--layout-iterations', dest='layout_iterations', type=int, default=100,
+                        help='Layout iterations')
+    parser.add_argument('--seed', type=int, default=1, help='Random seed of the synthetic networks')
+    parser.add_argument('--output', type=str, default='benchmark.json', help='JSON result file')
+    parser.add_argument('--compare', type=str, default=None, help='Earlier JSON result file to compare to')
+    opts = parser.parse_args(args[1:])
+
+    logging.basicConfig(level=logging.INFO)
+    logging.getLogger('networkbuilder').setLevel(logging.WARNING)
+
+    results = []
+    for size in opts.sizes:
+        results.extend(benchmark(size, opts))
+
+    out = {'meta': {'created': datetime.datetime.now().isoformat(timespec='seconds'),
+                    'python': platform.python_version(),
+                    'platform': platform.platform(),
+                    'numpy': np.__version__,
+                    'networkx': nx.__version__,
+                    'metric_pool_size': metricPool.METRIC_POOL.max_workers,
+                    'multilevel_min_nodes': layout.MULTILEVEL_MIN_NODES,
+                    'options': vars(opts)},
+           'results': results}
+    with open(opts.output, 'w') as f:
+        json.dump(out, f, indent=1)
+    LOGGER.info("Results written to {}".format(opts.output))
+
+    if opts.compare:
+        compare(results, opts.compare)
+
+    metricPool.METRIC_POOL.shutdown()
+
+
+if __name__ == '__main__':
+    main(sys.argv)
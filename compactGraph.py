@@ -0,0 +1,177 @@
+'''
+Created on 18.10.2026
+# coding: utf-8
+'''
+
+from array import array
+from typing import Any, Dict, Iterable, List
+
+import networkx as nx
+import numpy as np
+import scipy.sparse as sp
+from scipy.sparse.csgraph import connected_components
+
+
+#   edge keys source*KEY_BASE+target, for node indices below 2**32
+KEY_BASE: int = 2**32
+
+
+class CompactGraph:
+    '''
+    Directed graph with an interned node id table, integer edge arrays and
+    columnar node and edge attributes. Used internally by the network builder,
+    to_networkx() converts it for callers needing a networkx graph.
+    Edges are appended to compact int32 arrays, deduplicated by an integer key, and read
+    as numpy COO arrays, converted once after each change.
+    '''
+
+    def __init__(self) -> None:
+        self.nodes: List[str] = []
+        self.index: Dict[str, int] = {}
+        self.node_attrs: Dict[str, List[Any]] = {}
+
+        self._src, self._trg = array('i'), array('i')
+        self._arrays = None
+        self.edge_index: Dict[int, int] = {}
+        self.edge_attrs: Dict[str, List[Any]] = {}
+
+    @property
+    def src(self) -> np.ndarray:
+        return self.__arrays()[0]
+
+    @property
+    def trg(self) -> np.ndarray:
+        return self.__arrays()[1]
+
+    def __arrays(self):
+        if self._arrays is None:
+            self._arrays = (np.frombuffer(self._src, dtype=np.int32).copy(),
+                            np.frombuffer(self._trg, dtype=np.int32).copy())
+        return self._arrays
+
+    def __contains__(self, n: str) -> bool:
+        return n in self.index
+
+    def __len__(self) -> int:
+        return len(self.nodes)
+
+    def number_of_nodes(self) -> int:
+        return len(self.nodes)
+
+    def number_of_edges(self) -> int:
+        return len(self._src)
+
+    def add_node(self, n: str) -> int:
+        i = self.index.get(n)
+        if i is None:
+            i = self.index[n] = len(self.nodes)
+            self.nodes.append(n)
+            for col in self.node_attrs.values():
+                col.append(None)
+        return i
+
+    def set_node_attr(self, n: str, key: str, value: Any) -> None:
+        col = self.node_attrs.get(key)
+        if col is None:
+            col = self.node_attrs[key] = [None]*len(self.nodes)
+        col[self.index[n]] = value
+
+    def has_edge(self, u: str, v: str) -> bool:
+        i, j = self.index.get(u), self.index.get(v)
+        return i is not None and j is not None and i*KEY_BASE+j in self.edge_index
+
+    def add_edge(self, u: str, v: str, attrs: Dict = None) -> int:
+        '''
+        Add an edge, or update the attributes of an existing one. Falsy attribute values are skipped.
+        '''
+        i, j = self.add_node(u), self.add_node(v)
+        key = i*KEY_BASE+j
+        e = self.edge_index.get(key)
+        if e is None:
+            e = self.edge_index[key] = len(self._src)
+            self._src.append(i)
+            self._trg.append(j)
+            self._arrays = None
+            for col in self.edge_attrs.values():
+                col.append(None)
+
+        for key, value in (attrs or {}).items():
+            if value:
+                col = self.edge_attrs.get(key)
+                if col is None:
+                    col = self.edge_attrs[key] = [None]*len(self._src)
+                col[e] = value
+        return e
+
+    def edgeArrays(self):
+        '''
+        return source and target index arrays, and the numeric 'weight' values (default 1)
+        '''
+        src, trg = self.src.copy(), self.trg.copy()
+
+        weight = [w if isinstance(w, (int, float)) else 1 for w in self.edge_attrs.get('weight', [1]*len(src))]
+        #   keep integer weights as integers, e.g. weighted degree 3 instead of 3.0
+        weight = np.array(weight, dtype=np.int64 if all(isinstance(w, int) for w in weight) else np.float64)
+        return src, trg, weight
+
+    def degree(self) -> np.ndarray:
+        '''
+        return unweighted degrees, in and out degree summed, by node index
+        '''
+        n = len(self.nodes)
+        return np.bincount(self.src, minlength=n) + np.bincount(self.trg, minlength=n)
+
+    def weakly_connected_components(self) -> np.ndarray:
+        '''
+        return component labels by node index, labels numbered in the order of the nodes
+        '''
+        n = len(self.nodes)
+        A = sp.csr_matrix((np.ones(len(self._src)), (self.src, self.trg)), shape=(n, n))
+        _, labels = connected_components(A, directed=True, connection='weak')
+        return labels
+
+    def remove_nodes(self, indices: Iterable[int]) -> None:
+        '''
+        Remove the nodes by their indices together with their edges, the remaining nodes are re-indexed
+        '''
+        keep = np.ones(len(self.nodes), dtype=bool)
+        keep[np.fromiter(indices, dtype=np.int64)] = False
+        if keep.all():
+            return
+
+        new_index = (np.cumsum(keep)-1).astype(np.int32)
+        kept = np.flatnonzero(keep).tolist()
+        self.nodes = [self.nodes[i] for i in kept]
+        self.index = dict((n, i) for i, n in enumerate(self.nodes))
+        for key, col in self.node_attrs.items():
+            self.node_attrs[key] = [col[i] for i in kept]
+
+        edges = np.flatnonzero(keep[self.src] & keep[self.trg])
+        src, trg = new_index[self.src[edges]], new_index[self.trg[edges]]
+        self._src, self._trg = array('i', src.tobytes()), array('i', trg.tobytes())
+        self._arrays = (src, trg)
+        keys = src.astype(np.int64)*KEY_BASE+trg
+        self.edge_index = dict(zip(keys.tolist(), range(len(edges))))
+        edges = edges.tolist()
+        for key, col in self.edge_attrs.items():
+            self.edge_attrs[key] = [col[e] for e in edges]
+
+    def relabel(self, names: List[str]) -> None:
+        '''
+        Rename the nodes, names are given by node index
+        '''
+        self.nodes = list(names)
+        self.index = dict((n, i) for i, n in enumerate(self.nodes))
+
+    def node_data(self, i: int) -> Dict:
+        return dict((k, col[i]) for k, col in self.node_attrs.items() if col[i] is not None)
+
+    def edge_data(self, e: int) -> Dict:
+        return dict((k, col[e]) for k, col in self.edge_attrs.items() if col[e] is not None)
+
+    def to_networkx(self) -> nx.DiGraph:
+        G = nx.DiGraph()
+        G.add_nodes_from((n, self.node_data(i)) for i, n in enumerate(self.nodes))
+        G.add_edges_from((self.nodes[i], self.nodes[j], self.edge_data(e))
+                         for e, (i, j) in enumerate(zip(self.src.tolist(), self.trg.tolist())))
+        return G
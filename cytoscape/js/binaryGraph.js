@@ -0,0 +1,71 @@
+// Decode a result queried with format='binary'
+//
+// fetch(url).then(r => r.arrayBuffer()).then(decodeGraph)
+// returns {ids, src, trg, nodeColumns, edgeColumns, metrics, ...}, where src and trg are
+// Uint32Arrays of node indices, and numeric columns are typed arrays indexed like ids or src.
+
+var TYPED_ARRAYS = {
+	'int32': Int32Array,
+	'uint32': Uint32Array,
+	'float64': Float64Array
+};
+
+function decodeArray(buffer, desc) {
+	return new TYPED_ARRAYS[desc.dtype](buffer, desc.offset, desc.length);
+}
+
+function decodeColumn(buffer, desc) {
+	if (desc.type === 'json') {
+		return desc.values;
+	}
+	var arr = decodeArray(buffer, desc);
+	if (desc.type === 'string') {
+		return Array.from(arr, function (code) {
+			return code < 0 ? null : desc.values[code];
+		});
+	}
+	return arr;
+}
+
+function decodeGraph(buffer) {
+	var magic = new TextDecoder().decode(new Uint8Array(buffer, 0, 4));
+	if (magic !== 'S2GB') {
+		throw new Error('Not a binary graph');
+	}
+	var view = new DataView(buffer);
+	var length = view.getUint32(8, true);
+	var graph = JSON.parse(new TextDecoder().decode(new Uint8Array(buffer, 12, length)));
+
+	graph.src = decodeArray(buffer, graph.src);
+	graph.trg = decodeArray(buffer, graph.trg);
+	['node_columns', 'edge_columns'].forEach(function (key) {
+		var columns = {};
+		Object.keys(graph[key]).forEach(function (name) {
+			columns[name] = decodeColumn(buffer, graph[key][name]);
+		});
+		graph[key === 'node_columns' ? 'nodeColumns' : 'edgeColumns'] = columns;
+		delete graph[key];
+	});
+	return graph;
+}
+
+// cytoscape.js elements of a decoded graph, like the result of format='cytoscape'
+function toElements(graph) {
+	function data(columns, i, ob) {
+		Object.keys(columns).forEach(function (name) {
+			var v = columns[name][i];
+			if (v !== null && v !== undefined && !(typeof v === 'number' && isNaN(v))) {
+				ob[name] = v;
+			}
+		});
+		return {data: ob};
+	}
+	return {
+		nodes: graph.ids.map(function (id, i) {
+			return data(graph.nodeColumns, i, {id: id, value: id, name: id});
+		}),
+		edges: Array.from(graph.src, function (s, e) {
+			return data(graph.edgeColumns, e, {source: graph.ids[s], target: graph.ids[graph.trg[e]]});
+		})
+	};
+}
@@ -0,0 +1,33 @@
+// Restore full node uris of a result queried with compact_ids='curie' or 'index'
+
+function expandId(id, res) {
+	if (res.ids) {
+		id = res.ids[parseInt(id)];
+	}
+	var i = id.indexOf(':');
+	if (i > 0 && res.prefixes && res.prefixes.hasOwnProperty(id.substring(0, i))) {
+		return res.prefixes[id.substring(0, i)] + id.substring(i+1);
+	}
+	return id;
+}
+
+function expandIds(res) {
+	if (!res.prefixes) {
+		return res;
+	}
+	res.elements.nodes.forEach(function (node) {
+		var id = expandId(node.data.id, res);
+		if (node.data.name === node.data.id) {
+			node.data.name = id;
+		}
+		node.data.id = id;
+		node.data.value = id;
+	});
+	res.elements.edges.forEach(function (edge) {
+		edge.data.source = expandId(edge.data.source, res);
+		edge.data.target = expandId(edge.data.target, res);
+	});
+	delete res.prefixes;
+	delete res.ids;
+	return res;
+}
@@ -0,0 +1,205 @@
+'''
+Created on 18.10.2026
+# coding: utf-8
+
+Local stand-in SPARQL endpoint serving a synthetic correspondence network shaped like
+the results of the EMLO example queries (example_queries/emlo): links with ?source ?target
+?weight ?start ?end, and nodes with ?id ?name ?class. Used by benchmarkNetworkbuilder.py and the tests.
+
+The queries are not parsed: a query selecting ?source returns the links of the ids in its
+VALUES ?id { ... }, or all links if none are given, and any other query returns the nodes
+of the ids in its VALUES ?id { ... }. LIMIT is respected.
+
+example to serve 10000 links:
+python fakeSparqlEndpoint.py --links 10000 --port 3030
+'''
+
+import argparse
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import logging
+import os
+import re
+import sys
+import threading
+from typing import Dict, List
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+
+LOGGER = logging.getLogger(__name__)
+
+ID_PREFIX = 'http://emlo.bodleian.ox.ac.uk/id/'
+CLASSES = ['http://www.cidoc-crm.org/cidoc-crm/E21_Person', 'http://www.cidoc-crm.org/cidoc-crm/E74_Group']
+XSD_INTEGER = 'http://www.w3.org/2001/XMLSchema#integer'
+
+VALUES_ID = re.compile(r'VALUES\s+\?id\s*\{([^}]*)\}', re.IGNORECASE)
+URI = re.compile(r'<([^>]+)>')
+LIMIT = re.compile(r'LIMIT\s+(\d+)', re.IGNORECASE)
+SELECTS_SOURCE = re.compile(r'SELECT[^{]*\?source', re.IGNORECASE)
+
+QUERY_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'example_queries', 'emlo')
+
+
+def loadQuery(name: str) -> str:
+    with open(os.path.join(QUERY_DIR, name)) as f:
+        return f.read()
+
+
+def emloQueries() -> Dict[str, str]:
+    '''
+    The prefixes, nodes and links queries of example_queries/emlo, by their QueryParams field
+    '''
+    return {'prefixes': loadQuery('prefices.sparql'),
+            'nodes': loadQuery('nodes.sparql'),
+            'links': loadQuery('links_ego.sparql')}
+
+
+class EmloData:
+    '''
+    Synthetic letters between correspondents, a few of whom write most of the letters
+    '''
+
+    def __init__(self, links: int = 10000, nodes: int = None, seed: int = 1) -> None:
+        rng = np.random.default_rng(seed)
+        n = nodes or max(10, links//4)
+        self.ids = ['{}{:08x}-0000-4000-8000-{:012x}'.format(ID_PREFIX, i, i) for i in range(n)]
+
+        #   heavy-tailed activity of the correspondents
+        p = 1.0/np.arange(1, n+1)**0.9
+        p /= p.sum()
+        src = rng.choice(n, size=links, p=p)
+        trg = rng.choice(n, size=links, p=p)
+        trg = np.where(src == trg, (trg+1) % n, trg)
+        years = rng.integers(1550, 1750, size=links)
+
+        self.links = [{'source': self.ids[s], 'target': self.ids[t], 'weight': 1,
+                       'start': '{}-01-01'.format(y), 'end': '{}-12-31'.format(y)}
+                      for s, t, y in zip(src.tolist(), trg.tolist(), years.tolist())]
+        self.incident: Dict[str, List[int]] = defaultdict(list)
+        for e, ob in enumerate(self.links):
+            self.incident[ob['source']].append(e)
+            self.incident[ob['target']].append(e)
+
+        self.nodes = dict((n, {'id': n, 'name': 'Correspondent {}'.format(i), 'class': CLASSES[int(i % 7 == 0)]})
+                          for i, n in enumerate(self.ids))
+
+    def answer(self, query: str) -> List[Dict]:
+        m = VALUES_ID.search(query)
+        ids = [n for n in URI.findall(m.group(1)) if n not in ('ID', 'ID_SET')] if m else []
+        m = LIMIT.search(query)
+        limit = int(m.group(1)) if m else None
+
+        if SELECTS_SOURCE.search(query):
+            if ids:
+                edges = sorted(set(e for n in ids for e in self.incident.get(n, [])))
+                rows = [self.links[e] for e in edges]
+            else:
+                rows = self.links
+        else:
+            rows = [self.nodes[n] for n in ids if n in self.nodes]
+        return rows[:limit]
+
+
+def bindings(rows: List[Dict]) -> Dict:
+    '''
+    SPARQL JSON result of the rows
+    '''
+    def term(v):
+        if isinstance(v, int):
+            return {'type': 'literal', 'datatype': XSD_INTEGER, 'value': str(v)}
+        if v.startswith('http'):
+            return {'type': 'uri', 'value': v}
+        return {'type': 'literal', 'value': v}
+
+    variables = list(dict.fromkeys(k for ob in rows for k in ob))
+    return {'head': {'vars': variables},
+            'results': {'bindings': [dict((k, term(v)) for k, v in ob.items()) for ob in rows]}}
+
+
+class FakeSparqlEndpoint:
+    '''
+    The endpoint served in a background thread, e.g.
+    with FakeSparqlEndpoint(EmloData(1000)) as endpoint:
+        ... query endpoint.url
+    '''
+
+    def __init__(self, data: EmloData, host: str = '127.0.0.1', port: int = 0) -> None:
+        self.data = data
+        self.queries = 0
+
+        endpoint = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                self.respond(parse_qs(urlparse(self.path).query))
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get('Content-Length', 0))).decode('utf-8')
+                if self.headers.get('Content-Type', '').startswith('application/sparql-query'):
+                    self.respond({'query': [body]})
+                else:
+                    self.respond(parse_qs(body))
+
+            def respond(self, params):
+                if 'query' not in params:
+                    self.send_error(400, 'No query')
+                    return
+                endpoint.queries += 1
+                body = json.dumps(bindings(endpoint.data.answer(params['query'][0]))).encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/sparql-results+json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                LOGGER.debug(format % args)
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        self.__thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return 'http://{}:{}/sparql'.format(host, port)
+
+    def start(self) -> 'FakeSparqlEndpoint':
+        self.__thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.__thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self) -> 'FakeSparqlEndpoint':
+        return self.start()
+
+    def __exit__(self, *args) -> None:
+        self.stop()
+
+
+def main(args):
+    parser = argparse.ArgumentParser(description='Serve a synthetic EMLO-shaped network as a SPARQL endpoint')
+    parser.add_argument('--links', type=int, default=10000, help='Number of links')
+    parser.add_argument('--nodes', type=int, default=None, help='Number of nodes, default links/4')
+    parser.add_argument('--seed', type=int, default=1, help='Random seed')
+    parser.add_argument('--port', type=int, default=3030, help='Port')
+    opts = parser.parse_args(args[1:])
+
+    logging.basicConfig(level=logging.INFO)
+    endpoint = FakeSparqlEndpoint(EmloData(opts.links, opts.nodes, opts.seed), port=opts.port)
+    LOGGER.info("Serving {} links at {}".format(opts.links, endpoint.url))
+    try:
+        endpoint.server.serve_forever()
+    except KeyboardInterrupt:
+        endpoint.server.server_close()
+
+
+if __name__ == '__main__':
+    main(sys.argv)
@@ -0,0 +1,365 @@
+'''
+Created on 18.10.2026
+# coding: utf-8
+'''
+
+import csv
+import io
+import json
+from json.encoder import encode_basestring_ascii
+import math
+import re
+import struct
+from typing import Dict, Iterator, List, Tuple
+from xml.sax.saxutils import escape, quoteattr
+
+import numpy as np
+
+from compactGraph import CompactGraph
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+CURIE: str  = 'curie'
+INDEX: str  = 'index'
+COMPACT_IDS: Tuple[str, ...] = (CURIE, INDEX)
+
+BINARY_MAGIC: bytes = b'S2GB'
+BINARY_VERSION: int = 1
+INT32_RANGE = (-2**31, 2**31-1)
+
+#   nodes or edges per chunk of the streamed formats
+STREAM_CHUNK: int = 1000
+
+PREFIX_DECLARATION = re.compile(r'PREFIX\s+([\w\-.]*):\s*<([^>]*)>', re.IGNORECASE)
+
+
+def parsePrefixes(prefixes: str) -> Dict[str, str]:
+    '''
+    return the namespaces of the SPARQL PREFIX declarations, e.g. {'skos': 'http://www.w3.org/2004/02/skos/core#'}
+    '''
+    return dict(PREFIX_DECLARATION.findall(prefixes or ''))
+
+
+def compactId(uri: str, namespaces: List) -> str:
+    '''
+    return the uri as a CURIE with the longest matching namespace, or the uri itself
+    '''
+    for prefix, ns in namespaces:
+        if uri.startswith(ns):
+            return '{}:{}'.format(prefix, uri[len(ns):])
+    return uri
+
+
+def compactIds(G: CompactGraph, prefixes: str, mode: str = CURIE) -> Dict:
+    '''
+    Rename the graph nodes with compact ids, and return the tables needed to restore the full uris:
+    - 'curie': nodes are named by CURIEs, returns {'prefixes': {prefix: namespace}}
+    - 'index': nodes are named by their index, returns also {'ids': [CURIE of each index]}
+    '''
+    table = parsePrefixes(prefixes)
+    namespaces = sorted(table.items(), key=lambda x: len(x[1]), reverse=True)
+    curies = [compactId(n, namespaces) for n in G.nodes]
+
+    #   keep only the prefixes in use
+    used = set(c.split(':', 1)[0] for c, n in zip(curies, G.nodes) if c != n)
+    res = {'prefixes': dict((p, ns) for p, ns in table.items() if p in used)}
+
+    if mode == INDEX:
+        res['ids'] = curies
+        G.relabel([str(i) for i in range(len(curies))])
+    else:
+        G.relabel(curies)
+    return res
+
+
+def encodeColumn(values: List) -> Tuple[Dict, np.ndarray]:
+    '''
+    Encode an attribute column, None meaning a missing value, as a typed array:
+    - 'int32' if all values are integers without missing values
+    - 'float64' for other numbers, NaN for missing values
+    - 'string' as int32 codes into the list of distinct 'values', -1 for missing values
+    - 'json' for anything else, listed in 'values' without an array
+    '''
+    present = [v for v in values if v is not None]
+    if present and all(isinstance(v, (int, float)) for v in present):
+        if len(present) == len(values) and all(isinstance(v, int) and INT32_RANGE[0] <= v <= INT32_RANGE[1]
+                                               for v in present):
+            return {'type': 'int32'}, np.array(values, dtype=np.int32)
+        return {'type': 'float64'}, np.array([np.nan if v is None else v for v in values], dtype=np.float64)
+
+    if all(isinstance(v, str) for v in present):
+        table = {}
+        codes = np.array([-1 if v is None else table.setdefault(v, len(table)) for v in values], dtype=np.int32)
+        return {'type': 'string', 'values': list(table)}, codes
+
+    return {'type': 'json', 'values': values}, None
+
+
+def toBinary(G: CompactGraph, metrics: Dict = None, tables: Dict = None) -> bytes:
+    '''
+    Columnar binary serialization of the graph, e.g. for typed arrays of a WebGL front-end:
+    magic 'S2GB', uint32 version and header length (little-endian), a JSON header, and the arrays
+    each starting at a multiple of 8 bytes. The header has the node 'ids', 'metrics', the id tables,
+    and the 'src' and 'trg' node indices of the edges and the node and edge attribute columns,
+    arrays given by their 'dtype', byte 'offset' from the start of the payload and 'length'.
+    See cytoscape/js/binaryGraph.js for decoding.
+    '''
+    arrays = []
+
+    def add(desc: Dict, arr: np.ndarray) -> Dict:
+        if arr is not None:
+            desc.update(dtype=arr.dtype.name, length=len(arr))
+            arrays.append((desc, arr))
+        return desc
+
+    header = {'version': BINARY_VERSION,
+              'ids': G.nodes,
+              'metrics': metrics or {},
+              **(tables or {}),
+              'src': add({}, np.array(G.src, dtype=np.uint32)),
+              'trg': add({}, np.array(G.trg, dtype=np.uint32)),
+              'node_columns': dict((k, add(*encodeColumn(col))) for k, col in G.node_attrs.items()),
+              'edge_columns': dict((k, add(*encodeColumn(col))) for k, col in G.edge_attrs.items())}
+
+    #   offsets depend on the header length, room is reserved for up to 11 digits each
+    for desc, _ in arrays:
+        desc['offset'] = 0
+    prefix = len(BINARY_MAGIC)+8
+    start = offset = _padded(prefix+len(json.dumps(header).encode('utf-8'))+10*len(arrays))
+    for desc, arr in arrays:
+        desc['offset'] = offset
+        offset += _padded(arr.nbytes)
+
+    head = json.dumps(header).encode('utf-8')
+    head += b' '*(start-prefix-len(head))
+    chunks = [BINARY_MAGIC, struct.pack('<II', BINARY_VERSION, len(head)), head]
+    for desc, arr in arrays:
+        data = arr.astype(arr.dtype.newbyteorder('<'), copy=False).tobytes()
+        chunks.append(data+b'\0'*(_padded(len(data))-len(data)))
+    return b''.join(chunks)
+
+
+def _padded(size: int, alignment: int = 8) -> int:
+    return -(-size//alignment)*alignment
+
+
+def attrType(values: List) -> str:
+    '''
+    GraphML type of an attribute column: 'boolean', 'long', 'double' or 'string'
+    '''
+    present = [v for v in values if v is not None]
+    if present and all(isinstance(v, bool) for v in present):
+        return 'boolean'
+    if present and all(isinstance(v, int) and not isinstance(v, bool) for v in present):
+        return 'long'
+    if present and all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in present):
+        return 'double'
+    return 'string'
+
+
+def _text(v) -> str:
+    return str(v).lower() if isinstance(v, bool) else str(v)
+
+
+def _chunks(items: Iterator[str]) -> Iterator[str]:
+    buffer = []
+    for item in items:
+        buffer.append(item)
+        if len(buffer) >= STREAM_CHUNK:
+            yield ''.join(buffer)
+            buffer = []
+    if buffer:
+        yield ''.join(buffer)
+
+
+def iterGraphml(G: CompactGraph, graph_attrs: Dict = None) -> Iterator[str]:
+    '''
+    Yield the graph as GraphML in chunks, in the layout of networkx generate_graphml with named key ids
+    '''
+    graph_attrs = graph_attrs or {}
+    yield ('<graphml xmlns="http://graphml.graphdrawing.org/xmlns" '
+           'xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance" '
+           'xsi:schemaLocation="http://graphml.graphdrawing.org/xmlns '
+           'http://graphml.graphdrawing.org/xmlns/1.0/graphml.xsd">\n')
+    for domain, columns in (('node', G.node_attrs), ('edge', G.edge_attrs),
+                            ('graph', dict((k, [v]) for k, v in graph_attrs.items()))):
+        for k, col in columns.items():
+            yield '  <key id={0} for="{1}" attr.name={0} attr.type="{2}" />\n'.format(quoteattr(k), domain, attrType(col))
+    yield '  <graph edgedefault="directed">\n'
+
+    def element(tag: str, attrs: str, columns: Dict, i: int) -> str:
+        data = ''.join('      <data key={}>{}</data>\n'.format(quoteattr(k), escape(_text(col[i])))
+                       for k, col in columns.items() if col[i] is not None)
+        if not data:
+            return '    <{} {} />\n'.format(tag, attrs)
+        return '    <{0} {1}>\n{2}    </{0}>\n'.format(tag, attrs, data)
+
+    yield from _chunks(element('node', 'id={}'.format(quoteattr(n)), G.node_attrs, i)
+                       for i, n in enumerate(G.nodes))
+    yield from _chunks(element('edge', 'source={} target={}'.format(quoteattr(G.nodes[s]), quoteattr(G.nodes[t])),
+                               G.edge_attrs, e)
+                       for e, (s, t) in enumerate(zip(G.src.tolist(), G.trg.tolist())))
+
+    for k, v in graph_attrs.items():
+        yield '    <data key={}>{}</data>\n'.format(quoteattr(k), escape(_text(v)))
+    yield '  </graph>\n</graphml>\n'
+
+
+def iterGexf(G: CompactGraph, graph_attrs: Dict = None) -> Iterator[str]:
+    '''
+    Yield the graph as GEXF 1.2 in chunks. Edge weights are written as the native edge weight,
+    the graph attributes as the graph description.
+    '''
+    yield ('<?xml version="1.0" encoding="UTF-8"?>\n'
+           '<gexf xmlns="http://www.gexf.net/1.2draft" version="1.2">\n')
+    if graph_attrs:
+        yield '  <meta>\n    <description>{}</description>\n  </meta>\n'.format(escape(json.dumps(graph_attrs)))
+    yield '  <graph defaultedgetype="directed" mode="static">\n'
+
+    edge_attrs = dict((k, col) for k, col in G.edge_attrs.items() if k != 'weight')
+    for domain, columns in (('node', G.node_attrs), ('edge', edge_attrs)):
+        if columns:
+            yield '    <attributes class="{}">\n'.format(domain)
+            for k, col in columns.items():
+                yield '      <attribute id={0} title={0} type="{1}" />\n'.format(quoteattr(k), attrType(col))
+            yield '    </attributes>\n'
+
+    def attvalues(columns: Dict, i: int) -> str:
+        values = ''.join('<attvalue for={} value={} />'.format(quoteattr(k), quoteattr(_text(col[i])))
+                         for k, col in columns.items() if col[i] is not None)
+        return '<attvalues>{}</attvalues>'.format(values) if values else ''
+
+    name = G.node_attrs.get('name')
+    yield '    <nodes>\n'
+    yield from _chunks('      <node id={} label={}>{}</node>\n'.format(
+                           quoteattr(n), quoteattr(str(name[i]) if name and name[i] is not None else n),
+                           attvalues(G.node_attrs, i))
+                       for i, n in enumerate(G.nodes))
+    yield '    </nodes>\n    <edges>\n'
+
+    weight = G.edge_attrs.get('weight')
+
+    def edge(e: int, s: int, t: int) -> str:
+        w = weight[e] if weight and isinstance(weight[e], (int, float)) else None
+        return '      <edge id="{}" source={} target={}{}>{}</edge>\n'.format(
+            e, quoteattr(G.nodes[s]), quoteattr(G.nodes[t]),
+            '' if w is None else ' weight="{}"'.format(w), attvalues(edge_attrs, e))
+
+    yield from _chunks(edge(e, s, t) for e, (s, t) in enumerate(zip(G.src.tolist(), G.trg.tolist())))
+    yield '    </edges>\n  </graph>\n</gexf>\n'
+
+
+def iterCsv(G: CompactGraph) -> Iterator[str]:
+    '''
+    Yield the edge list as CSV in chunks, with columns source, target and the edge attributes
+    '''
+    keys = list(G.edge_attrs)
+    out = io.StringIO()
+    writer = csv.writer(out)
+    writer.writerow(['source', 'target'] + keys)
+    src, trg = G.src.tolist(), G.trg.tolist()
+    for start in range(0, len(src), STREAM_CHUNK):
+        for e in range(start, min(start+STREAM_CHUNK, len(src))):
+            writer.writerow([G.nodes[src[e]], G.nodes[trg[e]]] +
+                            ['' if G.edge_attrs[k][e] is None else G.edge_attrs[k][e] for k in keys])
+        yield out.getvalue()
+        out.seek(0)
+        out.truncate()
+    if out.getvalue():
+        yield out.getvalue()
+
+
+def dumps(ob) -> str:
+    '''
+    JSON encoding with orjson if it is installed
+    '''
+    if orjson is not None:
+        try:
+            return orjson.dumps(ob).decode('utf-8')
+        except TypeError:
+            pass
+    return json.dumps(ob, separators=(',', ':'))
+
+
+def roundFloats(ob, precision: int):
+    '''
+    Round the floats in nested dicts and lists to precision decimals
+    '''
+    if isinstance(ob, float):
+        return round(ob, precision)
+    if isinstance(ob, dict):
+        return dict((k, roundFloats(v, precision)) for k, v in ob.items())
+    if isinstance(ob, (list, tuple)):
+        return [roundFloats(v, precision) for v in ob]
+    return ob
+
+
+def roundColumns(G: CompactGraph, precision: int) -> None:
+    '''
+    Round the float node and edge attributes to precision decimals
+    '''
+    for columns in (G.node_attrs, G.edge_attrs):
+        for k, col in columns.items():
+            columns[k] = [round(v, precision) if isinstance(v, float) else v for v in col]
+
+
+def encodeValues(key: str, values: List) -> List[str]:
+    '''
+    JSON fragments '"key":value' of an attribute column, None for missing values
+    '''
+    prefix = encode_basestring_ascii(key)+':'
+
+    def encode(v):
+        if v is None:
+            return None
+        if isinstance(v, str):
+            return prefix+encode_basestring_ascii(v)
+        if isinstance(v, bool):
+            return prefix+('true' if v else 'false')
+        if isinstance(v, int):
+            return prefix+int.__repr__(v)
+        if isinstance(v, float) and math.isfinite(v):
+            return prefix+float.__repr__(v)
+        return prefix+json.dumps(v)
+
+    return [encode(v) for v in values]
+
+
+def cytoscapeJson(G: CompactGraph, metrics: Dict = None, tables: Dict = None) -> bytes:
+    '''
+    The graph encoded as the JSON of networkx cytoscape_data with 'metrics' and the id tables,
+    written column by column without building the nested dicts
+    '''
+    node_columns = [encodeValues(k, col) for k, col in G.node_attrs.items()
+                    if k not in ('id', 'value', 'name')]
+    names = G.node_attrs.get('name', [None]*len(G.nodes))
+    encoded_names = encodeValues('name', names)
+
+    def node(i: int, n: str) -> str:
+        fields = [col[i] for col in node_columns if col[i] is not None]
+        ident = encode_basestring_ascii(n)
+        fields.append('"id":{0},"value":{0}'.format(ident))
+        #   like cytoscape_data, the id is the name if there is none
+        fields.append(encoded_names[i] if names[i] else '"name":'+ident)
+        return '{"data":{'+','.join(fields)+'}}'
+
+    edge_columns = [encodeValues(k, col) for k, col in G.edge_attrs.items() if k not in ('source', 'target')]
+    ids = [encode_basestring_ascii(n) for n in G.nodes]
+
+    def edge(e: int, s: int, t: int) -> str:
+        fields = [col[e] for col in edge_columns if col[e] is not None]
+        fields.append('"source":{},"target":{}'.format(ids[s], ids[t]))
+        return '{"data":{'+','.join(fields)+'}}'
+
+    chunks = ['{"data":[],"directed":true,"multigraph":false,"elements":{"nodes":[',
+              ','.join(node(i, n) for i, n in enumerate(G.nodes)),
+              '],"edges":[',
+              ','.join(edge(e, s, t) for e, (s, t) in enumerate(zip(G.src.tolist(), G.trg.tolist()))),
+              ']},"metrics":', dumps(metrics or {})]
+    for k, v in (tables or {}).items():
+        chunks.append(',{}:{}'.format(encode_basestring_ascii(k), dumps(v)))
+    chunks.append('}')
+    return ''.join(chunks).encode('utf-8')
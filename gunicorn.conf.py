@@ -0,0 +1,16 @@
+'''
+Created on 18.10.2026
+# coding: utf-8
+
+gunicorn settings, the command line options are given in the run script
+'''
+
+import os
+
+from prometheus_client import multiprocess
+
+
+def child_exit(server, worker):
+    #   live values of an exited worker are removed, its histograms are kept
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        multiprocess.mark_process_dead(worker.pid)
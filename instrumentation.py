@@ -0,0 +1,126 @@
+'''
+Created on 18.10.2026
+# coding: utf-8
+
+Per-request stage timings and sizes, aggregated as Prometheus histograms over
+the worker processes sharing PROMETHEUS_MULTIPROC_DIR, otherwise per process.
+'''
+
+from contextlib import contextmanager
+import os
+import threading
+import time
+from typing import Dict, Iterator, Optional, Tuple
+
+from prometheus_client import CollectorRegistry, Histogram, generate_latest, multiprocess
+
+PREFIX: str = 'sparql2graph'
+
+TIME_BUCKETS: Tuple[float, ...] = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+SIZE_BUCKETS: Tuple[float, ...] = tuple(float(10**i) for i in range(9))
+
+#   with PROMETHEUS_MULTIPROC_DIR set, the values are written to files in it and summed over the worker processes
+MULTIPROC_DIR: Optional[str] = os.environ.get('PROMETHEUS_MULTIPROC_DIR') or None
+
+REGISTRY = CollectorRegistry()
+STAGE_SECONDS = Histogram(PREFIX+'_stage_seconds', 'Duration of the query stages', ['stage'],
+                          buckets=TIME_BUCKETS, registry=REGISTRY)
+SIZES = Histogram(PREFIX+'_size', 'Sizes of the query results: rows, nodes, edges and bytes', ['kind'],
+                  buckets=SIZE_BUCKETS, registry=REGISTRY)
+REQUEST_SECONDS = Histogram(PREFIX+'_request_seconds', 'Duration of the requests', ['route'],
+                            buckets=TIME_BUCKETS, registry=REGISTRY)
+
+
+class RequestRecord:
+    '''
+    Stage timings in seconds and sizes of one request, repeated stages summed
+    '''
+
+    def __init__(self, route: str = None) -> None:
+        self.route = route
+        self.started = time.time()
+        self.timings: Dict[str, float] = {}
+        self.sizes: Dict[str, int] = {}
+
+    def asdict(self) -> Dict:
+        return {'timings': dict((k, round(v, 6)) for k, v in self.timings.items()),
+                'sizes': dict(self.sizes)}
+
+
+_local = threading.local()
+
+
+def current() -> Optional[RequestRecord]:
+    return getattr(_local, 'record', None)
+
+
+def begin(route: str = None) -> RequestRecord:
+    _local.record = RequestRecord(route)
+    return _local.record
+
+
+def end(route: str = None) -> None:
+    '''
+    Observe the duration of the current request and forget it
+    '''
+    record = current()
+    if record is not None:
+        REQUEST_SECONDS.labels(route or record.route or '').observe(time.time()-record.started)
+    _local.record = None
+
+
+@contextmanager
+def request(route: str = None) -> Iterator[RequestRecord]:
+    '''
+    Record the stages of a request, or join the request already being recorded by this thread
+    '''
+    record = current()
+    if record is not None:
+        yield record
+        return
+
+    record = begin(route)
+    try:
+        yield record
+    finally:
+        end(route)
+
+
+def observeTime(name: str, seconds: float, label: str = None) -> None:
+    '''
+    Record a stage duration for the current request by name, and in the histogram by label, e.g.
+    'fetch_depth_2' labelled as 'fetch_depth'
+    '''
+    record = current()
+    if record is not None:
+        record.timings[name] = record.timings.get(name, 0.0)+seconds
+    STAGE_SECONDS.labels(label or name).observe(seconds)
+
+
+def observeSize(name: str, value: int) -> None:
+    record = current()
+    if record is not None:
+        record.sizes[name] = record.sizes.get(name, 0)+value
+    SIZES.labels(name).observe(value)
+
+
+@contextmanager
+def stage(name: str, label: str = None) -> Iterator[None]:
+    t0 = time.time()
+    try:
+        yield
+    finally:
+        observeTime(name, time.time()-t0, label)
+
+
+def exposition() -> bytes:
+    '''
+    The histograms of all worker processes in the Prometheus text format, or of this process
+    if PROMETHEUS_MULTIPROC_DIR is not set
+    '''
+    if MULTIPROC_DIR is None:
+        return generate_latest(REGISTRY)
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry, path=MULTIPROC_DIR)
+    return generate_latest(registry)
+
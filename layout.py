@@ -0,0 +1,306 @@
+'''
+Created on 18.10.2026
+# coding: utf-8
+'''
+
+from collections import OrderedDict
+import math
+import os
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import scipy.sparse as sp
+from scipy.sparse.csgraph import connected_components
+
+#   above this many nodes the repulsion is approximated on a grid, which is faster already at a few hundred nodes
+EXACT_MAX_NODES: int = 200
+#   max. number of grid cells per axis
+GRID_MAX_CELLS: int = 64
+#   max. number of node pairs in the temporary arrays of the repulsion
+BLOCK_SIZE: int = 2**18
+
+FORCE: str = 'force'
+MULTILEVEL: str = 'multilevel'
+#   size of the coarsest graph of a multilevel layout
+COARSEST_MAX_NODES: int = 200
+#   graphs larger than this are laid out by multilevel_layout, unless another method is requested
+MULTILEVEL_MIN_NODES: int = int(os.environ.get('LAYOUT_MULTILEVEL_MIN_NODES', 5000))
+
+
+def force_layout(n: int, src, trg, weight=None, pos=None, fixed=None,
+                 iterations: int = 100, time_budget: float = None, seed: int = None,
+                 threshold: float = 1e-4, temperature: float = None) -> np.ndarray:
+    '''
+    Fruchterman-Reingold force-directed layout of the graph with n nodes and the edge arrays src, trg.
+    - pos: (n,2) initial positions, random in [-1,1] if None
+    - fixed: (n,2) boolean mask of coordinates kept at their initial value, e.g. only x of a node
+    - the whole cooling schedule of iterations runs vectorized, stopping early after time_budget seconds
+    - temperature: the largest initial step, by default a tenth of the extent of pos
+    - for more than EXACT_MAX_NODES nodes the repulsion of distant nodes is approximated by grid cells
+    Returns the (n,2) positions.
+    '''
+    t0 = time.time()
+    rng = np.random.default_rng(seed)
+
+    if pos is None:
+        pos = rng.uniform(-1, 1, (n, 2))
+    pos = np.array(pos, dtype=np.float64)
+    pos0 = pos.copy()
+    if fixed is None:
+        fixed = np.zeros((n, 2), dtype=bool)
+    fixed = np.asarray(fixed, dtype=bool)
+    if n < 2 or fixed.all():
+        return pos
+
+    src, trg = np.asarray(src, dtype=np.int64), np.asarray(trg, dtype=np.int64)
+    weight = np.ones(len(src)) if weight is None else np.asarray(weight, dtype=np.float64)
+    #   no self loops in the forces
+    mask = src != trg
+    src, trg, weight = src[mask], trg[mask], weight[mask]
+
+    k = math.sqrt(1.0/n)
+    t = temperature or max(np.ptp(pos[:, 0]), np.ptp(pos[:, 1]), 0.1)*0.1
+    dt = t/(iterations+1)
+    repulsion = _exact_repulsion if n <= EXACT_MAX_NODES else _grid_repulsion
+
+    for _ in range(iterations):
+        displacement = repulsion(pos, k)
+
+        #   attraction along the edges
+        delta = pos[src]-pos[trg]
+        distance = np.maximum(np.hypot(delta[:, 0], delta[:, 1]), 0.01)
+        force = delta*(weight*distance/k)[:, None]
+        np.subtract.at(displacement, src, force)
+        np.add.at(displacement, trg, force)
+
+        length = np.maximum(np.hypot(displacement[:, 0], displacement[:, 1]), 0.01)
+        delta_pos = displacement*(t/length)[:, None]
+        delta_pos[fixed] = 0.0
+        pos += delta_pos
+        t -= dt
+
+        if np.linalg.norm(delta_pos)/n < threshold:
+            break
+        if time_budget is not None and time.time()-t0 > time_budget:
+            break
+
+    pos[fixed] = pos0[fixed]
+    if not fixed.any():
+        pos = _rescale(pos)
+    return pos
+
+
+def _exact_repulsion(pos: np.ndarray, k: float) -> np.ndarray:
+    return _pairwise(pos[:, 0], pos[:, 1], pos[:, 0], pos[:, 1], k*k)
+
+
+def _pairwise(x, y, cx, cy, coef, padded: bool = False) -> np.ndarray:
+    '''
+    Repulsive displacement k^2*delta/|delta|^2 of the points (x,y) from the points (cx,cy), broadcast over the last axis.
+    With padded, the nan points are left out.
+    '''
+    dx = x[..., :, None]-cx[..., None, :]
+    dy = y[..., :, None]-cy[..., None, :]
+    w = coef/np.maximum(dx*dx+dy*dy, 1e-4)
+    total = np.nansum if padded else np.sum
+    return np.stack([total(dx*w, axis=-1), total(dy*w, axis=-1)], axis=-1)
+
+
+def _grid_repulsion(pos: np.ndarray, k: float) -> np.ndarray:
+    '''
+    Repulsion from the nodes in the same grid cell exactly, and from the other cells by their centroids.
+    The cells are split at coordinate quantiles, so that each holds about n/g^2 nodes, and
+    g = n^(1/4) cells per axis, at most GRID_MAX_CELLS, balance the work of the two parts.
+    The pairwise terms are summed in blocks of at most BLOCK_SIZE pairs, so that the memory use stays O(n+g^2).
+    '''
+    n = len(pos)
+    g = int(np.clip(n**0.25, 2, GRID_MAX_CELLS))
+    #   slabs of equal size along x, each split to cells of equal size along y
+    slab = np.empty(n, dtype=np.int64)
+    slab[np.argsort(pos[:, 0], kind='stable')] = np.arange(n)*g//n
+    order = np.lexsort((pos[:, 1], slab))
+    slab_size = np.bincount(slab, minlength=g)
+    rank = np.arange(n)-np.concatenate([[0], np.cumsum(slab_size)[:-1]])[slab[order]]
+    cell = np.empty(n, dtype=np.int64)
+    cell[order] = slab[order]*g+rank*g//slab_size[slab[order]]
+
+    count = np.bincount(cell, minlength=g*g).astype(np.float64)
+    centroid = np.stack([np.bincount(cell, weights=pos[:, i], minlength=g*g) for i in (0, 1)], axis=1)
+    occupied = np.flatnonzero(count)
+    centroid = centroid[occupied]/count[occupied, None]
+    own = np.searchsorted(occupied, cell)
+
+    #   far field: every node from every other occupied cell, in blocks of nodes
+    displacement = np.empty((n, 2))
+    coef = k*k*count[occupied]
+    rows = max(1, BLOCK_SIZE//len(occupied))
+    for i in range(0, n, rows):
+        j = min(n, i+rows)
+        block_coef = np.broadcast_to(coef, (j-i, len(occupied))).copy()
+        block_coef[np.arange(j-i), own[i:j]] = 0.0
+        displacement[i:j] = _pairwise(pos[i:j, 0], pos[i:j, 1], centroid[:, 0], centroid[:, 1], block_coef)
+
+    #   near field: node pairs within each cell, padded with nan to the largest cell, in blocks of cells
+    order = np.argsort(cell, kind='stable')
+    sorted_own = own[order]
+    rank = np.arange(n)-np.searchsorted(sorted_own, sorted_own)
+    size = int(rank.max())+1
+    padded = np.full((len(occupied), size, 2), np.nan)
+    padded[sorted_own, rank] = pos[order]
+
+    near = np.empty_like(padded)
+    cells = max(1, BLOCK_SIZE//(size*size))
+    for i in range(0, len(occupied), cells):
+        x, y = padded[i:i+cells, :, 0], padded[i:i+cells, :, 1]
+        near[i:i+cells] = _pairwise(x, y, x, y, k*k, padded=True)
+    displacement[order] += near[sorted_own, rank]
+    return displacement
+
+
+def _rescale(pos: np.ndarray, scale: float = 1.0) -> np.ndarray:
+    '''
+    Center the positions and scale them to [-scale, scale]
+    '''
+    pos = pos-pos.mean(axis=0)
+    lim = np.abs(pos).max()
+    return pos*(scale/lim) if lim > 0 else pos
+
+
+def coarsen(n: int, src: np.ndarray, trg: np.ndarray, weight: np.ndarray):
+    '''
+    Aggregate each node with the neighbour it has the heaviest link to, ties broken by index.
+    Returns the number of groups, the group of each node and the summed edge arrays between the groups.
+    '''
+    u, v = np.concatenate([src, trg]), np.concatenate([trg, src])
+    w = np.concatenate([weight, weight])
+    #   heaviest neighbour of each node, the last one in the order by node, weight and neighbour
+    order = np.lexsort((v, w, u))
+    pick = np.arange(n)
+    pick[u[order]] = v[order]
+
+    A = sp.coo_matrix((np.ones(n), (np.arange(n), pick)), shape=(n, n))
+    k, group = connected_components(A, directed=True, connection='weak')
+
+    C = sp.coo_matrix((w, (group[u], group[v])), shape=(k, k)).tocsr()
+    C = sp.triu(C, k=1).tocoo()
+    return k, group, C.row, C.col, C.data/2
+
+
+def multilevel_layout(n: int, src, trg, weight=None, iterations: int = 100, time_budget: float = None,
+                      seed: int = None) -> np.ndarray:
+    '''
+    Force-directed layout by coarsening the graph until at most COARSEST_MAX_NODES remain,
+    laying out the coarsest graph, and then placing the nodes of each finer level at their
+    groups' positions and refining them with a few low temperature iterations.
+    Returns the (n,2) positions.
+    '''
+    deadline = None if time_budget is None else time.time()+time_budget
+    rng = np.random.default_rng(seed)
+
+    src, trg = np.asarray(src, dtype=np.int64), np.asarray(trg, dtype=np.int64)
+    weight = np.ones(len(src)) if weight is None else np.asarray(weight, dtype=np.float64)
+    mask = src != trg
+    levels = [(n, src[mask], trg[mask], weight[mask])]
+    groups = []
+    while levels[-1][0] > COARSEST_MAX_NODES:
+        k, group, *edges = coarsen(*levels[-1])
+        #   stop when the graph no longer shrinks, e.g. isolated nodes
+        if k > 0.9*levels[-1][0]:
+            break
+        levels.append((k, *edges))
+        groups.append(group)
+
+    def remaining():
+        return None if deadline is None else max(deadline-time.time(), 0.0)
+
+    pos = force_layout(*levels[-1], iterations=iterations, time_budget=remaining(), seed=seed)
+    for level, group in zip(reversed(levels[:-1]), reversed(groups)):
+        k = math.sqrt(1.0/level[0])
+        pos = pos[group] + rng.normal(0, 0.5*k, (level[0], 2))
+        if deadline is None or time.time() < deadline:
+            pos = force_layout(*level, pos=pos, iterations=max(10, iterations//4), time_budget=remaining(),
+                               seed=seed, temperature=2*k)
+    return _rescale(pos)
+
+
+def place_new_nodes(pos: np.ndarray, known: np.ndarray, src, trg, seed: int = None) -> np.ndarray:
+    '''
+    Initial positions for the nodes not marked known: the mean of their already placed neighbours,
+    spreading outwards from the known nodes, with a small jitter. Nodes without a placed neighbour
+    get a random position within the extent of the known ones.
+    '''
+    rng = np.random.default_rng(seed)
+    pos, placed = np.array(pos, dtype=np.float64), np.array(known, dtype=bool)
+    n = len(pos)
+    if not placed.any():
+        return pos
+
+    lo, hi = pos[placed].min(axis=0), pos[placed].max(axis=0)
+    jitter = 0.01*max(np.max(hi-lo), 1e-3)
+    src, trg = np.asarray(src, dtype=np.int64), np.asarray(trg, dtype=np.int64)
+    u, v = np.concatenate([src, trg]), np.concatenate([trg, src])
+
+    while not placed.all():
+        #   links from placed to unplaced nodes
+        e = placed[v] & ~placed[u]
+        if not e.any():
+            break
+        count = np.bincount(u[e], minlength=n)
+        new = count > 0
+        for i in (0, 1):
+            pos[new, i] = np.bincount(u[e], weights=pos[v[e], i], minlength=n)[new]/count[new]
+        pos[new] += rng.normal(0, jitter, (new.sum(), 2))
+        placed |= new
+
+    rest = ~placed
+    pos[rest] = rng.uniform(lo, hi, (rest.sum(), 2))
+    return pos
+
+
+class LayoutCache:
+    '''
+    In-memory LRU cache of node positions by layout key, e.g. QueryParams.layoutKey(),
+    used as the starting positions of the next layout of the same query and ego.
+    Each entry holds the positions of the latest layout only.
+    '''
+
+    def __init__(self, maxsize: int = 128) -> None:
+        self.maxsize = maxsize
+        self.__items = OrderedDict()
+        self.__lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Dict[str, Tuple[float, float]]]:
+        if self.maxsize <= 0:
+            return None
+
+        with self.__lock:
+            entry = self.__items.get(key)
+            if entry is None:
+                return None
+            self.__items.move_to_end(key)
+            return dict(entry)
+
+    def set(self, key: str, positions: Dict[str, Tuple[float, float]]) -> None:
+        '''
+        Store the positions of a layout, replacing the earlier ones of the key
+        '''
+        if self.maxsize <= 0:
+            return
+
+        with self.__lock:
+            self.__items[key] = dict(positions)
+            self.__items.move_to_end(key)
+            while len(self.__items) > self.maxsize:
+                self.__items.popitem(last=False)
+
+    def clear(self) -> None:
+        with self.__lock:
+            self.__items.clear()
+
+    def __len__(self) -> int:
+        return len(self.__items)
+
+
+LAYOUT_CACHE = LayoutCache(maxsize=int(os.environ.get('LAYOUT_CACHE_SIZE', 128)))
@@ -0,0 +1,213 @@
+'''
+Created on 18.10.2026
+# coding: utf-8
+
+Offline snapshot of a link dump (source, target, weight, start, end) stored as
+integer-indexed numpy arrays, which are memory-mapped and shared by the worker processes.
+
+example to import a dump:
+python linkSnapshot.py links.csv snapshots/emlo
+'''
+
+import argparse
+import csv
+import json
+import logging
+import os
+import re
+import shutil
+import sys
+import threading
+import time
+from typing import Dict, Iterable, Iterator, List
+
+import numpy as np
+
+LOGGER = logging.getLogger(__name__)
+
+COLUMNS: List[str] = ['source', 'target', 'weight', 'start', 'end']
+ARRAYS: List[str] = ['ids', 'src', 'trg', 'weight', 'start', 'end', 'out_indptr', 'out_edges', 'in_indptr', 'in_edges']
+SNAPSHOT_NAME = re.compile(r'^[\w\-.]+$')
+#   file naming the current generation of a snapshot directory
+CURRENT: str = 'CURRENT'
+
+
+def importLinks(rows: Iterable[Dict], directory: str) -> int:
+    '''
+    Write the link rows to a new generation of a snapshot directory, returns the number of links.
+    The processes reading the snapshot switch to the new generation on their next query.
+    '''
+    ids, index = [], {}
+    src, trg, weight, start, end = [], [], [], [], []
+
+    def intern(n):
+        i = index.get(n)
+        if i is None:
+            i = index[n] = len(ids)
+            ids.append(n)
+        return i
+
+    for ob in rows:
+        src.append(intern(ob['source']))
+        trg.append(intern(ob['target']))
+        weight.append(ob.get('weight') or 1)
+        start.append(ob.get('start') or '')
+        end.append(ob.get('end') or '')
+
+    #   nodes are numbered in the sorted order of their UTF-8 encoded ids, for a binary search
+    encoded = np.array([n.encode('utf-8') for n in ids], dtype=bytes)
+    order = np.argsort(encoded, kind='stable')
+    renumber = np.empty(len(ids), dtype=np.int32)
+    renumber[order] = np.arange(len(ids), dtype=np.int32)
+
+    n, m = len(ids), len(src)
+    src, trg = renumber[np.array(src, dtype=np.int64)], renumber[np.array(trg, dtype=np.int64)]
+    arrays = {'ids': encoded[order],
+              'src': src,
+              'trg': trg,
+              'weight': np.array(weight, dtype=np.int64 if all(isinstance(w, int) for w in weight) else np.float64),
+              'start': np.array(start, dtype=str),
+              'end': np.array(end, dtype=str)}
+
+    #   edges sorted by source and by target, with offsets by node index
+    for name, arr in (('out', src), ('in', trg)):
+        arrays[name+'_edges'] = np.argsort(arr, kind='stable').astype(np.int32)
+        arrays[name+'_indptr'] = np.concatenate([[0], np.cumsum(np.bincount(arr, minlength=n))]).astype(np.int64)
+
+    generation = str(time.time_ns())
+    os.makedirs(os.path.join(directory, generation))
+    for name, arr in arrays.items():
+        np.save(os.path.join(directory, generation, name+'.npy'), arr)
+
+    tmp = os.path.join(directory, CURRENT+'.tmp')
+    with open(tmp, 'w') as f:
+        f.write(generation)
+    os.replace(tmp, os.path.join(directory, CURRENT))
+
+    #   the previous generation is kept for the processes still loading it, the memory maps of
+    #   the removed ones stay valid until closed
+    generations = sorted((g for g in os.listdir(directory) if g.isdigit()), key=int)
+    for old in generations[:-2]:
+        shutil.rmtree(os.path.join(directory, old), ignore_errors=True)
+
+    LOGGER.info("Imported {} links between {} nodes to {}, generation {}".format(m, n, directory, generation))
+    return m
+
+
+def currentGeneration(directory: str) -> str:
+    with open(os.path.join(directory, CURRENT)) as f:
+        return f.read().strip()
+
+
+class LinkSnapshot:
+    '''
+    Read-only link store of the current generation of a snapshot directory. All arrays, also the
+    sorted node ids, are memory-mapped and thus shared by the processes.
+    '''
+
+    def __init__(self, directory: str, generation: str = None) -> None:
+        self.generation = generation or currentGeneration(directory)
+        for name in ARRAYS:
+            setattr(self, name, np.load(os.path.join(directory, self.generation, name+'.npy'), mmap_mode='r'))
+
+    def __len__(self) -> int:
+        return len(self.src)
+
+    def lookup(self, nodes: Iterable[str]) -> np.ndarray:
+        '''
+        return the indices of the nodes found in the snapshot
+        '''
+        keys = np.array([n.encode('utf-8') for n in nodes], dtype=bytes)
+        if len(keys) == 0 or len(self.ids) == 0:
+            return np.zeros(0, dtype=np.int64)
+        i = np.minimum(np.searchsorted(self.ids, keys), len(self.ids)-1)
+        return i[self.ids[i] == keys]
+
+    def links(self, nodes: Iterable[str]) -> List[Dict]:
+        '''
+        return the links having one of the nodes as source or target
+        '''
+        edges = []
+        for i in self.lookup(nodes).tolist():
+            edges.append(self.out_edges[self.out_indptr[i]:self.out_indptr[i+1]])
+            edges.append(self.in_edges[self.in_indptr[i]:self.in_indptr[i+1]])
+
+        if not edges:
+            return []
+        return list(self.rows(np.unique(np.concatenate(edges))))
+
+    def sample(self, limit: int) -> List[Dict]:
+        '''
+        return the first limit links of the dump
+        '''
+        return list(self.rows(range(min(limit, len(self)))))
+
+    def rows(self, edges: Iterable[int]) -> Iterator[Dict]:
+        for e in edges:
+            ob = {'source': self.ids[self.src[e]].decode('utf-8'),
+                  'target': self.ids[self.trg[e]].decode('utf-8'),
+                  'weight': self.weight[e].item()}
+            for key in ('start', 'end'):
+                v = str(getattr(self, key)[e])
+                if v:
+                    ob[key] = v
+            yield ob
+
+
+_snapshots: Dict[str, LinkSnapshot] = {}
+_lock = threading.Lock()
+
+
+def getSnapshot(name: str) -> LinkSnapshot:
+    '''
+    return the snapshot by its directory name under SNAPSHOT_DIR, loaded again when a new generation is imported
+    '''
+    if not SNAPSHOT_NAME.match(name) or name in ('.', '..'):
+        raise ValueError("Invalid snapshot name '{}'".format(name))
+
+    directory = os.path.join(os.environ.get('SNAPSHOT_DIR', 'snapshots'), name)
+    try:
+        generation = currentGeneration(directory)
+    except FileNotFoundError:
+        raise ValueError("Snapshot '{}' not found".format(name))
+
+    with _lock:
+        snapshot = _snapshots.get(name)
+        if snapshot is None or snapshot.generation != generation:
+            snapshot = _snapshots[name] = LinkSnapshot(directory, generation)
+        return snapshot
+
+
+def readLinks(file: str) -> Iterator[Dict]:
+    '''
+    Read link rows from a CSV file with a header row, or from a SPARQL JSON result
+    '''
+    if file.endswith('.json'):
+        with open(file) as f:
+            results = json.load(f)
+        for result in results['results']['bindings']:
+            ob = dict((k, v['value']) for k, v in result.items())
+            if 'weight' in ob:
+                ob['weight'] = float(ob['weight']) if '.' in ob['weight'] else int(ob['weight'])
+            yield ob
+    else:
+        with open(file, newline='') as f:
+            for ob in csv.DictReader(f):
+                if ob.get('weight'):
+                    ob['weight'] = float(ob['weight']) if '.' in ob['weight'] else int(ob['weight'])
+                yield ob
+
+
+def main(args):
+    parser = argparse.ArgumentParser(description='Import a link dump to a snapshot directory')
+    parser.add_argument('links', type=str,
+                        help='CSV file with columns {}, or a SPARQL JSON result'.format(', '.join(COLUMNS)))
+    parser.add_argument('directory', type=str, help='Snapshot directory')
+    opts = parser.parse_args(args[1:])
+
+    logging.basicConfig(level=logging.INFO)
+    importLinks(readLinks(opts.links), opts.directory)
+
+
+if __name__ == '__main__':
+    main(sys.argv)
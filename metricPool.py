@@ -0,0 +1,228 @@
+'''
+Created on 18.10.2026
+# coding: utf-8
+'''
+
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import logging
+import multiprocessing
+import os
+import shutil
+import tempfile
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+from scipy.sparse import csgraph
+
+from compactGraph import CompactGraph
+import networkfunctions as fnx
+
+LOGGER = logging.getLogger(__name__)
+
+SHM_DIR = '/dev/shm' if os.path.isdir('/dev/shm') else None
+
+#   the pool workers are started by a fork server, never forked from a threaded server worker
+START_METHOD = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+
+
+class SharedGraph:
+    '''
+    Edge arrays of a graph written once to memory-mapped files, which the pool
+    workers open without copying. Nodes are referred to by their integer index.
+    '''
+
+    def __init__(self, nodes: List, src: np.ndarray, trg: np.ndarray, weight: np.ndarray) -> None:
+        self.nodes = nodes
+        self.src, self.trg, self.weight = src, trg, weight
+        self.path = None
+
+    @classmethod
+    def fromCompact(cls, G: CompactGraph) -> 'SharedGraph':
+        return cls(G.nodes, *G.edgeArrays())
+
+    @property
+    def n(self) -> int:
+        return len(self.nodes)
+
+    @property
+    def desc(self) -> Tuple[str, int]:
+        '''
+        Picklable handle passed to the pool workers
+        '''
+        return self.path, self.n
+
+    def __enter__(self) -> 'SharedGraph':
+        self.path = tempfile.mkdtemp(prefix='sparql2graph_', dir=SHM_DIR)
+        for name, arr in (('src', self.src), ('trg', self.trg), ('weight', self.weight)):
+            np.save(os.path.join(self.path, name+'.npy'), arr)
+        return self
+
+    def __exit__(self, *args) -> None:
+        shutil.rmtree(self.path, ignore_errors=True)
+        self.path = None
+
+
+def loadArrays(desc: Tuple[str, int]) -> Tuple[int, np.ndarray, np.ndarray, np.ndarray]:
+    path, n = desc
+    return (n,) + tuple(np.load(os.path.join(path, name+'.npy'), mmap_mode='r')
+                        for name in ('src', 'trg', 'weight'))
+
+
+def degrees(shared: SharedGraph) -> Dict[str, List]:
+    '''
+    Degree values (degree, in and out degree, all both weighted and unweighted) per node index
+    '''
+    n, src, trg, w = shared.n, shared.src, shared.trg, shared.weight
+    res = {'in_degree': np.bincount(trg, minlength=n),
+           'out_degree': np.bincount(src, minlength=n),
+           'in_degree_weighted': np.bincount(trg, weights=w, minlength=n).astype(w.dtype),
+           'out_degree_weighted': np.bincount(src, weights=w, minlength=n).astype(w.dtype)}
+    res['degree'] = res['in_degree'] + res['out_degree']
+    res['degree_weighted'] = res['in_degree_weighted'] + res['out_degree_weighted']
+    return dict((k, v.tolist()) for k, v in res.items())
+
+
+class PageRankCache:
+    '''
+    Recently calculated pagerank vectors by node id, used as the starting vector
+    of the power iteration for the same or an overlapping graph.
+    The overlaps are estimated from a sample of at most sample_size nodes.
+    '''
+
+    def __init__(self, maxsize: int = 32, min_overlap: float = 0.5, sample_size: int = 256) -> None:
+        self.min_overlap = min_overlap
+        self.sample_size = sample_size
+        self.__items = deque(maxlen=maxsize)
+        self.__lock = threading.Lock()
+
+    def get(self, nodes: List, params: Tuple) -> Optional[np.ndarray]:
+        '''
+        Starting vector for nodes from the cached vector with the largest estimated Jaccard overlap
+        '''
+        if not nodes:
+            return None
+        sample = nodes[::max(1, len(nodes)//self.sample_size)]
+        best, best_overlap = None, self.min_overlap
+        with self.__lock:
+            items = list(self.__items)
+
+        for cached_params, values in items:
+            if cached_params != params:
+                continue
+            common = len(nodes)*sum(1 for n in sample if n in values)/len(sample)
+            overlap = common/(len(nodes)+len(values)-common) if common else 0.0
+            if overlap >= best_overlap:
+                best, best_overlap = values, overlap
+
+        if best is None:
+            return None
+
+        default = 1.0/len(nodes)
+        return np.array([best.get(n, default) for n in nodes])
+
+    def set(self, nodes: List, params: Tuple, x: np.ndarray) -> None:
+        with self.__lock:
+            self.__items.append((params, dict(zip(nodes, x.tolist()))))
+
+
+PAGERANK_CACHE = PageRankCache(maxsize=int(os.environ.get('PAGERANK_CACHE_SIZE', 32)))
+
+
+def pagerank(desc: Tuple[str, int], alpha: float = 0.85, seeds: List[int] = None, nstart: np.ndarray = None) -> np.ndarray:
+    '''
+    Pagerank values per node index, personalized to the seed node indices if given.
+    The power iteration starts from nstart, e.g. a recent result of PAGERANK_CACHE for an overlapping graph.
+    '''
+    n, src, trg, weight = loadArrays(desc)
+    personalization = None
+    if seeds:
+        personalization = np.zeros(n)
+        personalization[seeds] = 1.0
+    return fnx.pagerank_csr(n, src, trg, weight, alpha, personalization=personalization, nstart=nstart)
+
+
+def distances(desc: Tuple[str, int], source: int) -> Dict[int, int]:
+    '''
+    Hop distances from the source node index to the reachable node indices, in the undirected graph
+    '''
+    n, src, trg, _ = loadArrays(desc)
+    dist = fnx.bfs_distances(fnx.undirected_adjacency(n, src, trg), source)
+    reachable = np.flatnonzero(dist >= 0)
+    return dict(zip(reachable.tolist(), dist[reachable].tolist()))
+
+
+def graphMetrics(desc: Tuple[str, int], diameter_time_budget: float = None) -> Dict:
+    '''
+    General network metrics, e.g. diameter, number_of_edges, number_connected_components, average_degree, number_of_nodes.
+    If the diameter is not found within diameter_time_budget seconds, its lower bound is returned
+    with diameter_exact False and diameter_upper_bound.
+    Calculated on sparse matrices of the shared edge arrays.
+    '''
+    n, src, trg, _ = loadArrays(desc)
+    m = len(src)
+    if n==0 or m==0:
+        return {}
+
+    avd = 2*m/n
+
+    #    connected components
+    A = fnx.undirected_adjacency(n, src, trg)
+    ncc, labels = csgraph.connected_components(A, directed=False)
+
+    #    largest connected component
+    lcc = np.flatnonzero(labels == np.argmax(np.bincount(labels)))
+    Acc = A[lcc][:, lcc]
+
+    lower, upper = fnx.diameter_bounds(Acc, diameter_time_budget)
+    res = {'diameter': lower,
+           'diameter_exact': lower == upper}
+    if lower != upper:
+        res['diameter_upper_bound'] = upper
+
+    return {**res,
+            'number_connected_components': int(ncc),
+            'average_degree': avd,
+            'number_of_nodes': n,
+            'number_of_edges': m}
+
+
+class MetricPool:
+    '''
+    Persistent pool of worker processes for the CPU-bound graph metrics,
+    started on first use and restarted if a worker dies.
+    '''
+
+    def __init__(self, max_workers: int = 4) -> None:
+        self.max_workers = max_workers
+        self.__executor = None
+        self.__pid = None
+        self.__lock = threading.Lock()
+
+    def submit(self, fn: Callable, *args, **kwargs):
+        try:
+            return self.__get().submit(fn, *args, **kwargs)
+        except BrokenProcessPool:
+            LOGGER.warning("Metric pool broken, restarting")
+            self.shutdown()
+            return self.__get().submit(fn, *args, **kwargs)
+
+    def shutdown(self) -> None:
+        with self.__lock:
+            if self.__executor is not None and self.__pid == os.getpid():
+                self.__executor.shutdown(wait=False)
+            self.__executor = None
+
+    def __get(self) -> ProcessPoolExecutor:
+        with self.__lock:
+            #   pools are not inherited over a fork, e.g. by gunicorn workers
+            if self.__executor is None or self.__pid != os.getpid():
+                context = multiprocessing.get_context(START_METHOD)
+                self.__executor = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=context)
+                self.__pid = os.getpid()
+            return self.__executor
+
+
+METRIC_POOL = MetricPool(max_workers=int(os.environ.get('METRIC_POOL_SIZE', 4)))
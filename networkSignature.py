@@ -7,7 +7,7 @@ Created on 18.11.2020
 import logging
 
 from letter_analytics import ego
-from SPARQLWrapper import SPARQLWrapper, JSON, POST
+from sparqlClient import SPARQL_CLIENT
 
 LOGGER  = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO,
@@ -28,16 +28,7 @@ class NetworkSignature:
                       formatter="{:.3f}"):
         
         q = self.ego_query(opts)
-        sparql = SPARQLWrapper(opts.endpoint)
-
-        if opts.customHttpHeaders:
-            for k,v in opts.customHttpHeaders.items():
-                sparql.addCustomHttpHeader(k,v)
-        
-        sparql.setQuery(q)
-            
-        sparql.setReturnFormat(JSON)
-        results = sparql.query().convert()
+        results = SPARQL_CLIENT.query(opts.endpoint, q, opts.customHttpHeaders, method='GET')
         ea = ego.EgoAnalytics(opts.id, query=results)
         ea.social_signature(bin_type='linear', bin_n=5, max_rank=max_rank)
 
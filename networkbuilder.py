@@ -4,17 +4,30 @@ Created on 5.4.2019, modified 4.3.2020, 18.11.2020, 2.1.2021
 @author: petrileskinen
 '''
 
-from collections import defaultdict
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
+import dataclasses
+import heapq
+import itertools
+import json
 import logging
-import multiprocessing
+import os
 import networkx as nx
 import numpy as np
 import sys
 import time
-from typing import Dict, List, Set, Tuple, Type, Union
-
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple, Type, Union
+
+import metricPool
+from compactGraph import CompactGraph
+import graphSerializers
+import instrumentation
+import layout
+import linkSnapshot
+from metricPool import METRIC_POOL, SharedGraph
 import networkfunctions as fnx
-from SPARQLWrapper import SPARQLWrapper, JSON, POST
+from singleFlight import SingleFlight
+from sparqlClient import SPARQL_CLIENT
 from sklearn.preprocessing import MinMaxScaler
 
 LOGGER  = logging.getLogger(__name__)
@@ -28,68 +41,61 @@ IDSET: str = '<ID_SET>'
 class NetworkBuilder:
     CYTOSCAPE: str   = 'cytoscape'
     GRAPHML: str     = 'graphml'
+    BINARY: str      = 'binary'
+    GEXF: str        = 'gexf'
+    CSV: str         = 'csv'
+    #   formats returned as an iterator of text chunks
+    STREAMED_FORMATS = (GRAPHML, GEXF, CSV)
 
     DEPTH_MAX: int   = 30
 
-    def query(self, opts: Dict) -> Dict:
+    #   ids per query when filling <ID_SET>, parallel queries per request and retries per chunk
+    CHUNK_SIZE: int      = int(os.environ.get('SPARQL_CHUNK_SIZE', 200))
+    CHUNK_THREADS: int   = int(os.environ.get('SPARQL_CHUNK_THREADS', 4))
+    #   threads running the chunk queries of all requests of a process
+    CHUNK_POOL_SIZE: int = int(os.environ.get('SPARQL_CHUNK_POOL_SIZE', 16))
+    CHUNK_RETRIES: int   = int(os.environ.get('SPARQL_CHUNK_RETRIES', 2))
+    CHUNK_TIMEOUT: float = float(os.environ.get('SPARQL_CHUNK_TIMEOUT', 60))
+
+    def query(self, opts: Dict, encoded: bool = False) -> Dict:
+        '''
+        Build the network, with encoded the cytoscape format is returned as JSON bytes
+        '''
         if opts.log_level:
             LOGGER.setLevel(opts.log_level)
 
-        t0 = time.time()
-        
-        if opts.id:
-            #   if opts.id is provided, query a egocentric network
-            nodes, links = self.egocentric(opts)
-        else:
-            #   otherwise a sampled, sociocentric network
-            nodes, links = self.sociocentric(opts)
-        # LOGGER.debug('1: {} sec.'.format(time.time()-t0))
-
-        G = self.generateGraph([{'id': n} for n in nodes], links, opts)
-        # LOGGER.debug('2: {} sec.'.format(time.time()-t0))
+        with instrumentation.request():
+            if opts.id:
+                #   if opts.id is provided, query a egocentric network
+                with instrumentation.stage('fetch'):
+                    nodes, links = self.egocentric(opts)
+                with instrumentation.stage('build'):
+                    G = self.generateGraph([{'id': n} for n in nodes], links, opts)
+            elif opts.stream:
+                #   a sociocentric network, result rows added to the graph as they arrive
+                #   counts the streamed rows, zip advances the counter only for a received row
+                counter = itertools.count()
+                with instrumentation.stage('fetch'):
+                    G = self.generateGraph([], (ob for ob, _ in zip(self.sociocentricStream(opts), counter)), opts)
+                links = range(next(counter))
+            else:
+                #   otherwise a sampled, sociocentric network
+                with instrumentation.stage('fetch'):
+                    nodes, links = self.sociocentric(opts)
+                with instrumentation.stage('build'):
+                    G = self.generateGraph([{'id': n} for n in nodes], links, opts)
+            instrumentation.observeSize('rows', len(links))
 
-        # self.__debugGraph(G)
-        self.densifyGraph(G, opts)
-        # LOGGER.debug('3: {} sec.'.format(time.time()-t0))
+            # self.__debugGraph(G)
+            with instrumentation.stage('densify'):
+                self.densifyGraph(G, opts)
+            instrumentation.observeSize('nodes', G.number_of_nodes())
+            instrumentation.observeSize('edges', G.number_of_edges())
 
-        # self.__debugGraph(G)
-        node_data, metrics = self.getGraphDetails(G, opts)
-        # LOGGER.debug('4: {} sec.'.format(time.time()-t0))
-
-        #   if optimize>1, removed nodes causing trouble
-        try:
-            #   attach calculated data to network nodes
-            for ob in node_data:
-                n = ob.get('id')
-                if n:
-                    for k,v in ob.items():
-                        if k!='id':
-                            G.nodes[n][k] = v
-                else:
-                    LOGGER.debug("No 'id' found for {}".format(ob))
-        except Exception as e:
-            LOGGER.error("{} occured".format(e))
-            LOGGER.error("{}".format(node_data))
-            raise e
-        
-        '''
-        Check if coordinates need adjusting based on ?_x or ?_y result value
-        '''
-        for _,v in G.nodes(data=True):
-            if ('_x' in v.keys() or '_y' in v.keys()):
-                LOGGER.debug("self.adjustPositions")
-                self.adjustPositions(G)
-                break
+            # self.__debugGraph(G)
+            node_data, metrics = self.getGraphDetails(G, opts)
 
-        if opts.format == NetworkBuilder.GRAPHML:
-            # Choose graphml as the return format
-            res = '\n'.join(nx.generate_graphml(G, prettyprint=True, named_key_ids=True))
-        else:
-            # JSON for cytoscape as the return format
-            res = nx.readwrite.json_graph.cytoscape_data(G)
-            res['metrics'] = metrics
-        
-        return res
+            return self.formatGraph(G, node_data, metrics, opts, encoded)
 
     def query_ego(self, opts: Dict) -> Dict:
         '''Test for CoCo egographs.'''
@@ -114,6 +120,51 @@ class NetworkBuilder:
         node_data, metrics = self.getGraphDetails(G, opts)
         # LOGGER.debug('4: {} sec.'.format(time.time()-t0))
 
+        return self.formatGraph(G, node_data, metrics, opts)
+    
+
+    def query_batch(self, opts: Dict, ids: List[str], encoded: bool = False) -> Union[Dict, bytes]:
+        '''
+        Query the egocentric networks of several ids together. The neighborhoods are expanded
+        with shared link queries and the node metadata is fetched once for all networks.
+        Returns the results by ego id, with encoded as JSON bytes. The binary format is not supported.
+        '''
+        if opts.format == NetworkBuilder.BINARY:
+            raise ValueError("Format '{}' is not supported for several ids".format(opts.format))
+        if opts.log_level:
+            LOGGER.setLevel(opts.log_level)
+
+        graphs = {}
+        for ego, (nodes, links) in self.egocentricBatch(opts, ids).items():
+            ego_opts = dataclasses.replace(opts, id=ego)
+            G = self.generateGraph([{'id': n} for n in nodes], links, ego_opts)
+            self.densifyGraph(G, ego_opts)
+            graphs[ego] = G
+
+        union = list(dict.fromkeys(n for G in graphs.values() for n in G.nodes))
+        node_metadata = self.__nodeMetadata(opts, union)
+
+        res = {}
+        for ego, G in graphs.items():
+            ego_opts = dataclasses.replace(opts, id=ego)
+            node_data, metrics = self.getGraphDetails(G, ego_opts, node_metadata)
+            res[ego] = self.formatGraph(G, node_data, metrics, ego_opts, encoded)
+            if opts.format in NetworkBuilder.STREAMED_FORMATS:
+                res[ego] = ''.join(res[ego])
+
+        if encoded:
+            return ('{'+','.join('{}:{}'.format(graphSerializers.dumps(ego),
+                                                v.decode('utf-8') if isinstance(v, bytes) else graphSerializers.dumps(v))
+                                 for ego, v in res.items())+'}').encode('utf-8')
+        return res
+
+    def formatGraph(self, G: CompactGraph, node_data: List[Dict], metrics: Dict, opts: Dict,
+                    encoded: bool = False) -> Union[Dict, bytes, Iterator[str]]:
+        '''
+        Attach the node data to the graph, adjust the layout if needed, and return it in the opts.format.
+        The STREAMED_FORMATS are returned as an iterator of text chunks, and with encoded
+        the cytoscape format as JSON bytes.
+        '''
         #   if optimize>1, removed nodes causing trouble
         try:
             #   attach calculated data to network nodes
@@ -122,63 +173,116 @@ class NetworkBuilder:
                 if n:
                     for k,v in ob.items():
                         if k!='id':
-                            G.nodes[n][k] = v
+                            G.set_node_attr(n, k, v)
                 else:
                     LOGGER.debug("No 'id' found for {}".format(ob))
         except Exception as e:
             LOGGER.error("{} occured".format(e))
             LOGGER.error("{}".format(node_data))
             raise e
-        
+
+        id_tables = {}
+        if opts.compact_ids:
+            #   shorten node uris to CURIEs or indices, with tables for restoring them
+            id_tables = graphSerializers.compactIds(G, opts.prefixes, opts.compact_ids)
+
         '''
-        Check if coordinates need adjusting based on ?_x or ?_y result value
+        Check if coordinates need adjusting based on ?_x or ?_y result value, or if the layout is requested
         '''
-        for _,v in G.nodes(data=True):
-            if ('_x' in v.keys() or '_y' in v.keys()):
-                LOGGER.debug("self.adjustPositions")
-                self.adjustPositions(G)
-                break
-
+        if opts.adjust_layout or opts.layout or '_x' in G.node_attrs or '_y' in G.node_attrs:
+            with instrumentation.stage('layout'):
+                Gx = G.to_networkx()
+                self.__layout(Gx, opts)
+                for k in ('x', 'y'):
+                    for n, v in Gx.nodes(data=k):
+                        G.set_node_attr(n, k, v)
+
+        if opts.precision is not None:
+            graphSerializers.roundColumns(G, opts.precision)
+            metrics = graphSerializers.roundFloats(metrics, opts.precision)
+
+        if opts.timings and instrumentation.current() is not None:
+            #   the stages up to the serialization
+            metrics = {**metrics, **instrumentation.current().asdict()}
+
+        with instrumentation.stage('serialize'):
+            return self.__serialize(G, metrics, id_tables, opts, encoded)
+
+    def __serialize(self, G: CompactGraph, metrics: Dict, id_tables: Dict, opts: Dict, encoded: bool) -> Union[Dict, bytes, Iterator[str]]:
+        if encoded and opts.format != NetworkBuilder.BINARY and opts.format not in NetworkBuilder.STREAMED_FORMATS:
+            # Cytoscape JSON written straight from the compact graph, also for unknown formats
+            return graphSerializers.cytoscapeJson(G, metrics, id_tables)
+
+        graph_attrs = dict((k, json.dumps(v)) for k,v in id_tables.items())
+        if opts.format == NetworkBuilder.BINARY:
+            return graphSerializers.toBinary(G, metrics, id_tables)
         if opts.format == NetworkBuilder.GRAPHML:
-            # Choose graphml as the return format
-            res = '\n'.join(nx.generate_graphml(G, prettyprint=True, named_key_ids=True))
-        else:
-            # JSON for cytoscape as the return format
-            res = nx.readwrite.json_graph.cytoscape_data(G)
-            res['metrics'] = metrics
+            # GraphML streamed in chunks
+            return graphSerializers.iterGraphml(G, graph_attrs)
+        if opts.format == NetworkBuilder.GEXF:
+            return graphSerializers.iterGexf(G, graph_attrs)
+        if opts.format == NetworkBuilder.CSV:
+            return graphSerializers.iterCsv(G)
+
+        # JSON for cytoscape as the return format
+        res = nx.readwrite.json_graph.cytoscape_data(G.to_networkx())
+        res['metrics'] = metrics
+        res.update(id_tables)
         
         return res
-    
+
+    def __layout(self, G: nx.Graph, opts: Dict) -> None:
+        LOGGER.debug("self.adjustPositions")
+        #   indices are numbered per graph, so their positions can not be reused
+        cache_key = None if opts.compact_ids == graphSerializers.INDEX else opts.layoutKey()
+        self.adjustPositions(G, iterations=opts.layout_iterations, time_budget=opts.layout_time_budget,
+                             cache_key=cache_key, method=opts.layout)
 
     def egocentric(self, opts: Dict) -> Tuple[Union[List, Set], Dict]:
         """
-        Construct the network by sequential BFSearches
+        Construct the network by sequential BFSearches.
+        Each depth queries only the links of the new frontier nodes, in parallel chunks,
+        and the expansion stops as soon as the node budget optimize*limit is met.
         """
         #   start node(s)
-        nodes = opts.id.split(' ')
+        frontier = opts.id.split(' ')
 
         limit = int(opts.optimize*opts.limit)
         LOGGER.debug("Limit set to {}".format(limit))
 
+        #   nodes in the order found, as a dict
+        nodes, visited, links = {}, set(), {}
+
         t0 = time.time()
         # no more than DEPTH_MAX steps:
         for i in range(self.DEPTH_MAX):
+            n0 = len(nodes)
+            t1 = time.time()
 
-            node_list = ' '.join(["<{}>".format(n) for n in nodes])
-            query = opts.links.replace('<ID>', node_list)
+            for res in self.linksInChunks(opts, frontier):
+                if res is None:
+                    if i == 0:
+                        raise RuntimeError("Querying the links of {} failed".format(opts.id))
+                    LOGGER.warning("Skipping links of a frontier chunk at depth {}".format(i+1))
+                    continue
 
-            #if not 'LIMIT' in query:
-            #    query += " LIMIT {}".format(self.__optimizedLimit(opts))
-            
-            links = self.makeSparqlQuery(opts.prefixes+' '+query, opts.endpoint, opts.customHttpHeaders)
-            LOGGER.debug("Queried {} links".format(len(links)))
-            #   grow source nodes with the previous result
-            n0 = len(nodes)
-            nodes = self.__uniqueNodesFromLinks(links)
+                #   merge the links, identical result rows only once
+                for ob in res:
+                    links.setdefault(tuple(sorted(ob.items())), ob)
+                    nodes.setdefault(ob['source'])
+                    nodes.setdefault(ob['target'])
+
+                if len(nodes)>=limit:
+                    #   node budget met, skip the remaining chunks of this depth
+                    break
+
+            visited.update(frontier)
+            #   sorted, so that the chunks and the queries of a request are the same in every process
+            frontier = sorted(n for n in nodes if n not in visited)
+            instrumentation.observeTime('fetch_depth_{}'.format(i+1), time.time()-t1, 'fetch_depth')
             LOGGER.debug('Depth: {}, links {}, nodes {}, {:.4f} sec.'.format(i+1, len(links), len(nodes), time.time()-t0))
             
-            #   make at least 2 queries to received nodes further
-            if len(nodes)>=limit or len(nodes)==n0:
+            if len(nodes)>=limit or len(nodes)==n0 or not frontier:
                 LOGGER.debug('Breaking.')
                 break
 
@@ -186,7 +290,76 @@ class NetworkBuilder:
         if len(nodes)==0:
             nodes = [opts.id]
 
-        return nodes, links
+        return list(nodes), list(links.values())
+
+    def egocentricBatch(self, opts: Dict, ids: List[str]) -> Dict[str, Tuple[List, List[Dict]]]:
+        """
+        Construct egocentric networks of several ids by simultaneous BFSearches.
+        At each depth the union of the frontiers is queried, each node only once,
+        and the links are shared by all networks containing the node.
+        Returns (nodes, links) by ego id.
+        """
+        limit = int(opts.optimize*opts.limit)
+
+        #   links by the queried node they are incident to
+        incident = {}
+        egos = dict((ego, {'nodes': {}, 'visited': set(), 'links': {}, 'frontier': [ego]}) for ego in ids)
+        active = list(egos)
+
+        t0 = time.time()
+        for i in range(self.DEPTH_MAX):
+            if not active:
+                break
+
+            frontier = sorted(set(n for ego in active for n in egos[ego]['frontier'] if n not in incident))
+            for chunk, res in zip(self.__chunks(frontier), self.linksInChunks(opts, frontier)):
+                chunk_set = set(chunk)
+                for n in chunk:
+                    incident[n] = []
+                if res is None:
+                    LOGGER.warning("Skipping links of a frontier chunk at depth {}".format(i+1))
+                    continue
+                for ob in res:
+                    for n in {ob['source'], ob['target']} & chunk_set:
+                        incident[n].append(ob)
+
+            for ego in list(active):
+                state = egos[ego]
+                nodes, links = state['nodes'], state['links']
+                n0 = len(nodes)
+
+                for n in state['frontier']:
+                    for ob in incident[n]:
+                        links.setdefault(tuple(sorted(ob.items())), ob)
+                        nodes.setdefault(ob['source'])
+                        nodes.setdefault(ob['target'])
+                    state['visited'].add(n)
+                    if len(nodes)>=limit:
+                        #   node budget met, skip the rest of the frontier
+                        break
+
+                state['frontier'] = sorted(n for n in nodes if n not in state['visited'])
+                if len(nodes)>=limit or len(nodes)==n0 or not state['frontier']:
+                    active.remove(ego)
+
+            LOGGER.debug('Depth: {}, queried nodes {}, active egos {}, {:.4f} sec.'.format(i+1, len(incident), len(active), time.time()-t0))
+
+        #   no resulting links, show the center node itself
+        return dict((ego, (list(state['nodes']) or [ego], list(state['links'].values())))
+                    for ego, state in egos.items())
+
+    def linksInChunks(self, opts: Dict, nodes: List[str]) -> Iterator[List[Dict]]:
+        '''
+        Yield the links of the nodes in chunks of CHUNK_SIZE, None for a failed chunk.
+        The links are read from the opts.snapshot if given, otherwise queried by opts.links.
+        '''
+        if opts.snapshot:
+            snapshot = linkSnapshot.getSnapshot(opts.snapshot)
+            for chunk in self.__chunks(nodes):
+                yield snapshot.links(chunk)
+        else:
+            yield from self.queryInChunks(opts.prefixes+' '+opts.links, '<ID>', nodes,
+                                          opts.endpoint, opts.customHttpHeaders)
 
     def egocentricCoCo(self, opts: Dict) -> Tuple[Union[List, Set], Dict]:
         nodes = opts.id.split(' ')
@@ -204,38 +377,80 @@ class NetworkBuilder:
         LOGGER.debug("Queried {} links".format(len(res)))
 
         N = opts.limit or 500
-        edges = []
-
-        filter_source = lambda ob: ob.get('source') in nodes and (not ob.get('target') in nodes)
-        filter_target = lambda ob: ob.get('target') in nodes and (not ob.get('source') in nodes)
-
-        for _ in range(1,N):
-            dc = defaultdict(int)
+        edges, edge_keys = [], set()
+        in_nodes = set(nodes)
+
+        #   adjacency index: node -> indices of the result rows it occurs in
+        incident = defaultdict(list)
+        for idx, ob in enumerate(res):
+            incident[ob.get('source')].append(idx)
+            if ob.get('target') != ob.get('source'):
+                incident[ob.get('target')].append(idx)
+
+        #   candidate -> summed link weight to the current nodes, and its rank for breaking ties;
+        #   candidates linking to the nodes as a source come first, then in the order of the result rows
+        score, rank = {}, {}
+        heap = []
+
+        def addCandidate(c, weight, r):
+            score[c] = score.get(c, 0) + weight
+            rank[c] = min(rank.get(c, r), r)
+            heapq.heappush(heap, (-score[c], rank[c], c))
+
+        def join(v):
+            for idx in incident[v]:
+                ob = res[idx]
+                src, trg = ob.get('source'), ob.get('target')
+                if trg == v and src not in in_nodes:
+                    addCandidate(src, ob.get('weight'), (0, idx))
+                elif src == v and trg not in in_nodes:
+                    addCandidate(trg, ob.get('weight'), (1, idx))
+
+        for n in in_nodes:
+            join(n)
+
+        for i in range(1,N):
+            #   pop the best candidate, skipping outdated heap entries
+            while heap:
+                neg_score, r, c = heap[0]
+                if c in in_nodes or score[c] != -neg_score or rank[c] != r:
+                    heapq.heappop(heap)
+                else:
+                    break
 
-            for ob in filter(filter_target, res):
-                dc[ob.get('source')] += ob.get('weight')
+            if not heap:
+                break
 
-            for ob in filter(filter_source, res):
-                dc[ob.get('target')] += ob.get('weight')
-            # new_nodes = list((((ob.get('source'), ob.get('weight')) for ob in res if ob.get('target') in nodes)))
+            _, _, new_node = heapq.heappop(heap)
+            nodes.append(new_node)
+            in_nodes.add(new_node)
+            join(new_node)
 
-            if dc:
-                new_node, _ = max(dc.items(), key = lambda x:x[1])
-                nodes.append(new_node)
-                for ob in res:
-                    if ob.get('source') in nodes and ob.get('target') in nodes and ob not in edges:
-                        edges.append(ob)
+            #   add the links between the new node and the current nodes,
+            #   on the first round also the links between the initial nodes
+            if i == 1:
+                new_edges = [idx for idx, ob in enumerate(res)
+                             if ob.get('source') in in_nodes and ob.get('target') in in_nodes]
             else:
-                break
+                new_edges = sorted(idx for idx in incident[new_node]
+                                   if res[idx].get('source') in in_nodes and res[idx].get('target') in in_nodes)
+
+            for idx in new_edges:
+                key = tuple(sorted(res[idx].items()))
+                if key not in edge_keys:
+                    edge_keys.add(key)
+                    edges.append(res[idx])
 
         # print(f'Added {new_node}, nodes {len(nodes)}, edges {len(edges)}, density {len(edges)/len(nodes)}')
         return nodes, edges
 
     def sociocentric(self, opts: Dict) -> Tuple[Set, Dict]:
 
-        limit = self.__optimizedLimit(opts)
-        query = "{} {} LIMIT {}".format(opts.prefixes, opts.links, limit)
-        links = self.makeSparqlQuery(query, opts.endpoint, opts.customHttpHeaders)
+        if opts.snapshot:
+            links = linkSnapshot.getSnapshot(opts.snapshot).sample(self.__optimizedLimit(opts))
+        else:
+            query = self.__sociocentricQuery(opts)
+            links = self.makeSparqlQuery(query, opts.endpoint, opts.customHttpHeaders)
 
         if len(links)<1:
             LOGGER.debug("No links found")
@@ -245,125 +460,146 @@ class NetworkBuilder:
 
         return self.__uniqueNodesFromLinks(links), links
 
-    def generateGraph(self, nodes: Dict, links: Dict, opts: Dict) -> (nx.Graph):
+    def sociocentricStream(self, opts: Dict) -> Iterator[Dict]:
+        '''
+        Yield the links of a sampled, sociocentric network while they are being received
+        '''
+        if opts.snapshot:
+            return iter(linkSnapshot.getSnapshot(opts.snapshot).sample(self.__optimizedLimit(opts)))
+        query = self.__sociocentricQuery(opts)
+        return self.iterSparqlQuery(query, opts.endpoint, opts.customHttpHeaders)
+
+    def __sociocentricQuery(self, opts: Dict) -> str:
+        return "{} {} LIMIT {}".format(opts.prefixes, opts.links, self.__optimizedLimit(opts))
 
-        G = nx.DiGraph()
+    def generateGraph(self, nodes: Dict, links: Iterable[Dict], opts: Dict) -> CompactGraph:
+
+        G = CompactGraph()
 
         #    get all other fields except 'id' in nodes,
         #    e.g. queried parameters in SELECT ?label ?gender ...:
-        node_keys = set([key for ob in nodes for key in ob.keys()]) - set(['id'])
-
         for ob in nodes:
             _id = ob['id']
             G.add_node(_id)
-            for key in node_keys:
-                v = ob.get(key)
-                if v:
-                    G.nodes[_id][key] = v
-
-        #    get all other fields except 'source' and 'target' in nodes,
-        #    e.g. queried parameters in SELECT ?x ?y ...:
-        edge_keys = set([key for ob in links for key in ob.keys()]) - set(['source', 'target'])
+            for key, v in ob.items():
+                if v and key!='id':
+                    G.set_node_attr(_id, key, v)
 
+        #    add all other fields except 'source' and 'target' in links,
+        #    e.g. queried parameters in SELECT ?x ?y ...
+        #    links are walked only once, so they can also be streamed
         for ob in links:
             src, trg = ob['source'], ob['target']
 
-            if G.has_edge(trg, src) and opts.removeMultipleLinks:
+            if opts.removeMultipleLinks and G.has_edge(trg, src):
                 continue
-            
-            G.add_edge(src, trg)
 
             #   add query results:
-            for key in edge_keys:
-                v = ob.get(key)
-                if v:
-                    G.edges[src, trg][key] = v
+            G.add_edge(src, trg, dict((k, v) for k, v in ob.items() if k!='source' and k!='target'))
 
         return G
 
 
-    def getGraphDetails(self, G: (nx.Graph), opts: Dict) -> List[Dict]:
+    def getGraphDetails(self, G: CompactGraph, opts: Dict, node_metadata: Dict[str, Dict] = None) -> List[Dict]:
         '''
-        1) Fetch the node metadata by the opts.nodes query
+        1) Fetch the node metadata by the opts.nodes query, unless given by node id in node_metadata
         2) Calculate the network metrics, 
             - in/out_degrees for nodes
             - pagerank for nodes
             - diameter, number_of_edges, number_connected_components, average_degree', number_of_nodes, number_of_nodes for the entire graph
+        Pagerank, graph metrics and distances are calculated in a persistent pool of worker processes,
+        which read the edge arrays from shared memory and return plain arrays.
         '''
+        shared = SharedGraph.fromCompact(G)
+        nodes = shared.nodes
+        node_values = dict((n, {'id': n}) for n in nodes)
+        metrics = {}
+
+        with shared:
+            t0 = time.time()
+            tasks = {'metrics': METRIC_POOL.submit(metricPool.graphMetrics, shared.desc, opts.diameter_time_budget)}
+
+            #    pagerank is warm-started from a cached result for an overlapping graph
+            seeds = None
+            if opts.id and opts.personalized_pagerank:
+                seeds = [n for n in opts.id.split(' ') if n in G]
+            pagerank_params = (0.85, tuple(sorted(seeds or [])))
+            nstart = metricPool.PAGERANK_CACHE.get(nodes, pagerank_params)
+            tasks['pagerank'] = METRIC_POOL.submit(metricPool.pagerank, shared.desc, 0.85,
+                                                   [G.index[n] for n in seeds or []], nstart)
+
+            if opts.id:
+                #    distances in egocentric network
+                if opts.id in G:
+                    tasks['distance'] = METRIC_POOL.submit(metricPool.distances, shared.desc, G.index[opts.id])
+                else:
+                    LOGGER.debug("Source node '{}' not in graph, check the queries".format(opts.id))
+
+            #   completion times of the pool tasks
+            finished = {}
+            for prop, task in tasks.items():
+                task.add_done_callback(lambda _, prop=prop: finished.setdefault(prop, time.time()))
+
+            #    meanwhile, query the node metadata and calculate the degrees in this process
+            if node_metadata is None:
+                with instrumentation.stage('node_metadata'):
+                    node_metadata = self.__nodeMetadata(opts, nodes)
+            for n, ob in node_metadata.items():
+                if n in node_values:
+                    node_values[n].update(ob)
+
+            with instrumentation.stage('metric_degrees'):
+                for prop, arr in metricPool.degrees(shared).items():
+                    self.__writeProperty(node_values, nodes, arr, prop)
+
+            for prop, task in tasks.items():
+                try:
+                    res = task.result()
+                    instrumentation.observeTime('metric_graph' if prop == 'metrics' else 'metric_'+prop,
+                                                finished.get(prop, time.time())-t0)
+                except Exception as e:
+                    LOGGER.error("Calculating {} failed: {}".format(prop, e))
+                    continue
+
+                if prop == 'metrics':
+                    metrics = res
+                elif prop == 'distance':
+                    for i, d in res.items():
+                        node_values[nodes[i]][prop] = d
+                elif prop == 'pagerank':
+                    metricPool.PAGERANK_CACHE.set(nodes, pagerank_params, res)
+                    self.__writeProperty(node_values, nodes, res.tolist(), prop)
+                else:
+                    self.__writeProperty(node_values, nodes, res, prop)
 
-        manager, lock = multiprocessing.Manager(), multiprocessing.Lock()
-
-        node_values = manager.dict([(n, manager.dict(id=n)) for n in G.nodes()])
-        #for n in G.nodes():
-        #    node_values[n] = manager.dict()
-        #    node_values[n]['id'] = n
-
-        metrics = manager.dict()
-
-        ids = ' '.join(['<{}>'.format(x) for x in G.nodes()])
-        processes = [
-            multiprocessing.Process(target=self.getNodesForPeople,
-                                     args=(opts.prefixes+opts.nodes,
-                                           opts.endpoint, ids, node_values,
-                                           opts.customHttpHeaders, lock)),
-            multiprocessing.Process(target=self.pagerankGraph,
-                                     args=(G, node_values, 0.85, lock)),
-            multiprocessing.Process(target=self.degreesGraph,
-                                     args=(G, node_values, lock)),
-            multiprocessing.Process(target=self.graphMetrics,
-                                     args=(G, metrics, lock))
-            ]
-        
-        if opts.id:
-            #    distances in egocentric network
-            processes.append(multiprocessing.Process(target=self.distancesGraph,
-                                     args=(G, opts.id, node_values, lock)))
-        
-        for p in processes:
-            p.start()
-
-        for p in processes:
-            p.join()
-
-        return [dict(v) for _,v in node_values.items()], dict([ (k,v) for k,v in metrics.items() ] )
+        return list(node_values.values()), metrics
 
 
 
-    def densifyGraph(self, G: (nx.Graph), opts: Dict) -> None:
+    def densifyGraph(self, G: CompactGraph, opts: Dict) -> None:
         '''
         Densify the graph by removing
         - small connected components
         - low-degree nodes at the edge of network 
         '''
-        #    remove small connected components
-        wcc = sorted(nx.weakly_connected_components(G),
-                     key=len, reverse=True)
-        count = 0
-        for c in wcc:
+        #    remove small connected components, largest first
+        labels = G.weakly_connected_components()
+        sizes = np.bincount(labels)
+        count, removed = 0, []
+        for c in np.argsort(-sizes, kind='stable'):
             if count<opts.limit:
-                count += len(c)
+                count += sizes[c]
             else:
-                G.remove_nodes_from(c)
+                removed.append(c)
+        if removed:
+            G.remove_nodes(np.flatnonzero(np.isin(labels, removed)))
 
-        #    trim low degree nodes
-        n = G.number_of_nodes()
-        iters = 0
-        
-        while n > opts.limit and iters<100:
-            # Remove low degree nodes in a couple of batches:
-            arr = sorted([(k,v) for k,v in G.degree(weight=None)], key = lambda x: x[1])
-            
-            m = min(n-opts.limit, opts.limit)
-            arr = [k for k,_ in arr[:m] if k != opts.id]
-            if opts.id and opts.id in arr:
-                LOGGER.debug(f'Trying to remove ego node')
-            
-            if arr:
-                G.remove_nodes_from(arr)
-            n = G.number_of_nodes()
-            iters += 1
-            LOGGER.debug("Currently {} nodes at step {}.".format(n, iters))
-            # self.printGraph(G)
+        #    trim low degree nodes, the ego node is kept
+        src, trg, _ = G.edgeArrays()
+        removed = fnx.low_degree_peeling(G.number_of_nodes(), src, trg, opts.limit, keep=G.index.get(opts.id))
+        if removed:
+            G.remove_nodes(removed)
+            LOGGER.debug("Removed {}, currently {} nodes.".format(len(removed), G.number_of_nodes()))
 
 
     def __uniqueNodesFromLinks(self, links: Dict) -> Set:
@@ -373,117 +609,110 @@ class NetworkBuilder:
         return set([n['source'] for n in links]) | set([n['target'] for n in links])
 
 
-    def pagerankGraph(self, G: (nx.Graph), dct, alpha: float=0.85, lock=None) -> None:
-        '''
-        Calculates pagerank metric for each node
-        '''
-        t0 = time.time()
-        ans = nx.pagerank(G, alpha=alpha)
-        self.__writeProperty(dct, ans.items(), 'pagerank', lock)
-        # LOGGER.debug('pagerankGraph: {} sec.'.format(time.time()-t0))
-
+    def __debugGraph(self, G: CompactGraph) -> None:
+        LOGGER.debug('nodes {}'.format(G.number_of_nodes()))
+        LOGGER.debug('edges {}'.format(G.number_of_edges()))
 
 
-    def distancesGraph(self, G: (nx.Graph), source: str, dct: Dict, lock=None) -> None:
+    def __nodeMetadata(self, opts: Dict, nodes: List[str]) -> Dict[str, Dict]:
         '''
-        Calculates paths lengths from 'ego' to each 'alter' node in an egocentric network
+        Fetch the node metadata by node id, failures are logged
         '''
-        if source in G:
-            ans = fnx.distances(G, source) # ans = nx.shortest_path_length(G.to_undirected(), source=source)
-            self.__writeProperty(dct, ans.items(), 'distance', lock)
-        else:
-            LOGGER.debug("Source node '{}' not in graph, check the queries".format(source))
-
+        res = {}
+        try:
+            #   sorted, so that the chunk queries are the same for any node order
+            for ob in self.getNodesForPeople(opts.prefixes+opts.nodes, opts.endpoint,
+                                             sorted(nodes), opts.customHttpHeaders):
+                res.setdefault(ob['id'], {}).update(ob)
+        except Exception as e:
+            LOGGER.error("Fetching node metadata failed: {}".format(e))
+        return res
 
-    def degreesGraph(self, G: (nx.Graph), dct: Dict, lock=None) -> None:
+    def getNodesForPeople(self, query: str, endpoint: str, ids: List[str], customHttpHeaders: Dict = None) -> List[Dict]:
         '''
-        Calculates node degree values, (degree, in and out degree, all both weighted and unweighted)
+        Fetch the node metadata by filling the <ID_SET> of the query with the node ids.
+        Large id sets are queried in parallel chunks, a failing chunk is retried and finally skipped.
         '''
-        t0 =time.time()
-        self.__writeProperty(dct, fnx.degree(G, weight=None), 'degree', lock)
-        self.__writeProperty(dct, fnx.in_degree(G, weight=None), 'in_degree', lock)
-        self.__writeProperty(dct, fnx.out_degree(G, weight=None), 'out_degree', lock)
-
-        self.__writeProperty(dct, fnx.degree(G, weight='weight'), 'degree_weighted', lock)
-        self.__writeProperty(dct, fnx.in_degree(G, weight='weight'), 'in_degree_weighted', lock)
-        self.__writeProperty(dct, fnx.out_degree(G, weight='weight'), 'out_degree_weighted', lock)
-        # LOGGER.debug('degreesGraph: {} sec.'.format(time.time()-t0))
-
+        data = []
+        for chunk, res in zip(self.__chunks(ids), self.queryInChunks(query, IDSET, ids, endpoint, customHttpHeaders)):
+            if res is None:
+                LOGGER.error("Skipping metadata of {} nodes".format(len(chunk)))
+            else:
+                data.extend(res)
+        return data
 
-    def graphMetrics(self, G: (nx.Graph), metrics: Dict, lock=None) -> None:
+    def queryInChunks(self, query: str, placeholder: str, ids: List[str], endpoint: str,
+                      customHttpHeaders: Dict = None) -> Iterator[List[Dict]]:
         '''
-        Calculate general network metrics, e.g. diameter, number_of_edges, number_connected_components, average_degree', number_of_nodes, number_of_nodes 
+        Fill the placeholder, e.g. <ID_SET>, with chunks of CHUNK_SIZE ids and run the queries,
+        at most CHUNK_THREADS at a time in the shared pool. Yields the results in the order of the chunks,
+        None for a failed chunk.
         '''
-        t0 = time.time()
-        if len(G.nodes())==0 or len(G.edges)==0:
+        queries = [query.replace(placeholder, ' '.join(['<{}>'.format(x) for x in chunk]))
+                   for chunk in self.__chunks(ids)]
+        if len(queries) < 2:
+            #   no thread overhead for a single query
+            for q in queries:
+                yield self.__queryWithRetry(q, endpoint, customHttpHeaders)
             return
 
-        avd = 2*len(G.edges())/len(G.nodes())
-
-        #    connected components
-        Gu = G.to_undirected()
-        cc = list(nx.connected_components(Gu))
-        ncc = len(cc)
-
-        #    largest connected component
-        Gcc = Gu.subgraph(max(cc, key=len)).copy()
-
-        d = nx.diameter(Gcc)
-
-        lock.acquire()
-        m = metrics
-        m['diameter'] = d
-        m['number_connected_components'] = ncc
-        m['average_degree'] = avd
-        m['number_of_nodes'] = G.number_of_nodes()
-        m['number_of_edges'] = G.number_of_edges()
-        
-        metrics = m
-        lock.release()
+        pending = iter(queries)
+        futures = deque()
 
-        # LOGGER.debug('graphMetrics: {} sec.'.format(time.time()-t0))
+        def submitNext():
+            q = next(pending, None)
+            if q is not None:
+                futures.append(self.__executor.submit(self.__queryWithRetry, q, endpoint, customHttpHeaders))
 
-    def __debugGraph(self, G) -> None:
-        LOGGER.debug('nodes {}'.format(len(G.nodes())))
-        LOGGER.debug('edges {}'.format(len(G.edges())))
-
-
-    def getNodesForPeople(self, query, endpoint, ids, dct, customHttpHeaders=None, lock=None) -> None:
-
-        t0= time.time()
-        q = query.replace("<ID_SET>", ids)
-        
-        arr = self.makeSparqlQuery(q, endpoint, customHttpHeaders)
-        # LOGGER.debug('1. getNodesForPeople: {} sec.'.format(time.time()-t0))
-        lock.acquire()
-        for ob in arr:
-            n = ob['id']
-            dct[n] = {**dct[n], **ob} # nn
-        lock.release()
-        # LOGGER.debug('2. getNodesForPeople: {} sec.'.format(time.time()-t0))
-    '''
-    DEBUG    [networkbuilder.py: line 350]:	1. getNodesForPeople: 0.8707551956176758 sec.
-    DEBUG    [networkbuilder.py: line 359]:	2. getNodesForPeople: 2.7612321376800537 sec.
-    '''
-
-    def __writeProperty(self, dct, ans, prop, lock) -> None:
+        for _ in range(max(1, self.CHUNK_THREADS)):
+            submitNext()
+        try:
+            while futures:
+                res = futures.popleft().result()
+                submitNext()
+                yield res
+        finally:
+            for f in futures:
+                f.cancel()
+
+    def __queryWithRetry(self, query: str, endpoint: str, customHttpHeaders: Dict = None) -> Optional[List[Dict]]:
+        for attempt in range(self.CHUNK_RETRIES+1):
+            try:
+                return self.makeSparqlQuery(query, endpoint, customHttpHeaders, timeout=self.CHUNK_TIMEOUT)
+            except Exception as e:
+                LOGGER.warning("Chunk query failed ({}/{}): {}".format(attempt+1, self.CHUNK_RETRIES+1, e))
+                if attempt < self.CHUNK_RETRIES:
+                    time.sleep(0.5*2**attempt)
+        return None
+
+    def __chunks(self, ids: List[str]) -> List[List[str]]:
+        ids = list(ids)
+        size = max(1, self.CHUNK_SIZE)
+        return [ids[i:i+size] for i in range(0, len(ids), size)]
+
+    def __writeProperty(self, dct: Dict, nodes: List, values: List, prop: str) -> None:
         '''
-        Write values to multiprocessing result
+        Write an array of values indexed as nodes into the node dicts
         '''
-        lock.acquire()
-        for k,v in ans:
-            dd = dct[k]
-            dd[prop] = v
-            dct[k] = dd
-        lock.release()
+        for n, v in zip(nodes, values):
+            dct[n][prop] = v
 
     def __init__(self) -> None:
-        pass
+        #   shared by the requests served in parallel by the threads of a worker
+        self.__executor = ThreadPoolExecutor(max_workers=self.CHUNK_POOL_SIZE)
+        self.__single_flight = SingleFlight()
 
         
-    def adjustPositions(self, G: (nx.Graph), pos: Dict = None, iters: Tuple[int,int] = (10,10)) -> Dict:
+    def adjustPositions(self, G: (nx.Graph), pos: Dict = None, iterations: int = 100, time_budget: float = None,
+                        cache_key: str = None, method: str = None) -> Dict:
         '''
         Adjust x and y coordinates of the nodes if ?x or ?y are found in the sparql query result set.
+        The given coordinates are kept fixed while the layout is calculated for the rest.
+        With a cache_key, the positions of the previous layout of the same query and ego are kept,
+        and only the new nodes are placed next to their neighbours and relaxed. The random initial
+        positions are seeded by the cache_key, so that the workers lay out a query alike.
+        method 'multilevel' lays out a coarsened graph first, by default used for graphs larger than
+        layout.MULTILEVEL_MIN_NODES without fixed or reused positions.
         '''
         for coord, newcoord in [('_x', 'x'), ('_y', 'y')]:
             dct = dict([(k, v.get(coord)) for k,v in G.nodes(data=True) if v.get(coord)])
@@ -495,56 +724,94 @@ class NetworkBuilder:
                 for k,s in zip(dct.keys(), sdata):
                     G.nodes[k][newcoord] = s[0]
 
-        for _ in range(iters[0]):
-            #   adjust layout
-            pos = nx.drawing.layout.fruchterman_reingold_layout(G, iterations=iters[1], pos = pos)
-            
-            #   force fixed points
-            for k,v in G.nodes(data=True):
-                pos[k][0] = v.get('x', pos[k][0])
-                pos[k][1] = v.get('y', pos[k][1])
-
-        for k,_ in G.nodes(data=True):
-            G.nodes[k]['x'] = pos[k][0]
-            G.nodes[k]['y'] = pos[k][1]
+        if cache_key and pos is None:
+            pos = layout.LAYOUT_CACHE.get(cache_key)
+
+        seed = int(cache_key[:15], 16) if cache_key else None
+        rng = np.random.default_rng(seed)
+
+        nodes = list(G.nodes())
+        index = dict((n, i) for i, n in enumerate(nodes))
+        init = rng.uniform(-1, 1, (len(nodes), 2))
+        known = np.zeros(len(nodes), dtype=bool)
+        fixed = np.zeros((len(nodes), 2), dtype=bool)
+        for i, (k,v) in enumerate(G.nodes(data=True)):
+            if pos and k in pos:
+                init[i] = pos[k]
+                known[i] = True
+            for j, newcoord in enumerate(('x', 'y')):
+                if newcoord in v:
+                    init[i, j] = v[newcoord]
+                    fixed[i, j] = True
+
+        edges = [(index[u], index[v], w if isinstance(w, (int, float)) else 1)
+                 for u, v, w in G.edges(data='weight', default=1)]
+        src, trg, weight = (np.array(a) for a in zip(*edges)) if edges else ([], [], None)
+
+        temperature = None
+        if known.any():
+            #   incremental layout: earlier positions stay, new nodes relax around them
+            LOGGER.debug("Reusing the positions of {}/{} nodes".format(known.sum(), len(nodes)))
+            init = layout.place_new_nodes(init, known, src, trg, seed=seed)
+            fixed |= known[:, None]
+            iterations = max(10, iterations//4)
+            temperature = 0.02*max(np.ptp(init[:, 0]), np.ptp(init[:, 1]), 0.1)
+
+        if method is None:
+            method = layout.MULTILEVEL if len(nodes) > layout.MULTILEVEL_MIN_NODES else layout.FORCE
+
+        #   run in the metric pool, keeping the request threads free for I/O
+        if method == layout.MULTILEVEL and not fixed.any():
+            task = METRIC_POOL.submit(layout.multilevel_layout, len(nodes), src, trg, weight,
+                                      iterations=iterations, time_budget=time_budget, seed=seed)
+        else:
+            task = METRIC_POOL.submit(layout.force_layout, len(nodes), src, trg, weight, pos=init, fixed=fixed,
+                                      iterations=iterations, time_budget=time_budget, temperature=temperature,
+                                      seed=seed)
+        xy = task.result()
+
+        pos = dict((k, (float(x), float(y))) for k, (x, y) in zip(nodes, xy))
+        for k,(x,y) in pos.items():
+            G.nodes[k]['x'] = x
+            G.nodes[k]['y'] = y
+
+        if cache_key:
+            layout.LAYOUT_CACHE.set(cache_key, pos)
         
         return pos
 
     def __optimizedLimit(self, opts: Dict) -> int:
         return int(opts.optimize*opts.limit)
     
-    def makeSparqlQuery(self, query: str, endpoint: str, customHttpHeaders: Dict = None) -> List[Dict]:
-        sparql = SPARQLWrapper(endpoint)
-        sparql.setQuery(query)
-        sparql.setMethod(POST)
-        sparql.setReturnFormat(JSON)
-        
-        if customHttpHeaders:
-            for k,v in customHttpHeaders.items():
-                sparql.addCustomHttpHeader(k,v)
-        
-        try:
-            results = sparql.query().convert()
-        except Exception as e:
-            raise e
+    def makeSparqlQuery(self, query: str, endpoint: str, customHttpHeaders: Dict = None, timeout: float = None) -> List[Dict]:
+        #   identical queries in flight, e.g. from concurrent requests, share one fetch
+        key = (endpoint, query, json.dumps(customHttpHeaders, sort_keys=True))
+        results = self.__single_flight.do(key, lambda: SPARQL_CLIENT.query(endpoint, query, customHttpHeaders,
+                                                                          timeout=timeout))
         
-        data = []
-        for result in results["results"]["bindings"]:
-            ob = {}
-            for k,v in result.items():
-                #   convert common datatypes:
-                if v.get('datatype') == 'http://www.w3.org/2001/XMLSchema#decimal':
-                    ob[k] = float(v['value'])
-                elif v.get('datatype') == 'http://www.w3.org/2001/XMLSchema#integer':
-                    ob[k] = int(v['value'])
-                # NB. this does not export correctly to cytoscape format:
-                # elif v.get('datatype') == 'http://www.w3.org/2001/XMLSchema#date':
-                #    ob[k] = datetime.datetime.strptime(v['value'], '%Y-%m-%d').date()
-                else:
-                    ob[k] = str(v['value'])
-            data.append(ob)
+        return [self.__convertBinding(result) for result in results["results"]["bindings"]]
 
-        return data
+    def iterSparqlQuery(self, query: str, endpoint: str, customHttpHeaders: Dict = None) -> Iterator[Dict]:
+        '''
+        Yield the query results one by one while the response is being received
+        '''
+        for result in SPARQL_CLIENT.iterate(endpoint, query, customHttpHeaders):
+            yield self.__convertBinding(result)
+
+    def __convertBinding(self, result: Dict) -> Dict:
+        ob = {}
+        for k,v in result.items():
+            #   convert common datatypes:
+            if v.get('datatype') == 'http://www.w3.org/2001/XMLSchema#decimal':
+                ob[k] = float(v['value'])
+            elif v.get('datatype') == 'http://www.w3.org/2001/XMLSchema#integer':
+                ob[k] = int(v['value'])
+            # NB. this does not export correctly to cytoscape format:
+            # elif v.get('datatype') == 'http://www.w3.org/2001/XMLSchema#date':
+            #    ob[k] = datetime.datetime.strptime(v['value'], '%Y-%m-%d').date()
+            else:
+                ob[k] = str(v['value'])
+        return ob
 
 '''
 class QueryParams():
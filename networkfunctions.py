@@ -4,7 +4,11 @@ Created 23.8.2020
 @author: petrileskinen
 '''
 import networkx as nx
-from typing import Dict
+import numpy as np
+import scipy.sparse as sp
+from scipy.sparse import csgraph
+import time
+from typing import Dict, List, Tuple
 
 def degree(G, weight: str='weight') -> Dict:
     ''' return degrees of nodes in graph G. '''
@@ -21,3 +25,148 @@ def out_degree(G, weight: str='weight') -> Dict:
 def distances(G, source: str) -> Dict:
     ''' return distances from source to all other nodes in graph G. '''
     return nx.shortest_path_length(G.to_undirected(), source=source)
+
+def low_degree_peeling(n: int, src, trg, size: int, keep: int = None) -> List[int]:
+    '''
+    return the indices of nodes to remove from the graph of n nodes and edge arrays src, trg
+    to leave size nodes, lowest degree first. Degrees are updated as nodes are removed,
+    using a bucket queue of nodes by degree. The node keep is never removed.
+    '''
+    count = n - size
+    if count <= 0:
+        return []
+
+    src, trg = np.asarray(src, dtype=np.int64), np.asarray(trg, dtype=np.int64)
+    degree = (np.bincount(src, minlength=n) + np.bincount(trg, minlength=n)).tolist()
+
+    #   the other end of each edge of a node, once per edge
+    A = sp.csr_matrix((np.ones(2*len(src), dtype=np.int8), (np.concatenate([src, trg]), np.concatenate([trg, src]))),
+                      shape=(n, n))
+    A.sum_duplicates()
+    indptr, indices, counts = A.indptr.tolist(), A.indices.tolist(), A.data.tolist()
+
+    buckets = [dict() for _ in range(max(degree, default=0)+1)]
+    for v, d in enumerate(degree):
+        if v != keep:
+            buckets[d][v] = None
+
+    removed, removed_set = [], set()
+    d = 0
+    while len(removed) < count and d < len(buckets):
+        if not buckets[d]:
+            d += 1
+            continue
+
+        #   buckets keep the node order for equal degrees
+        v = next(iter(buckets[d]))
+        del buckets[d][v]
+        removed.append(v)
+        removed_set.add(v)
+
+        for k in range(indptr[v], indptr[v+1]):
+            u = indices[k]
+            if u == v or u in removed_set or u == keep:
+                continue
+            du = degree[u]
+            del buckets[du][u]
+            degree[u] = du-counts[k]
+            buckets[degree[u]][u] = None
+            d = min(d, degree[u])
+
+    return removed
+
+def undirected_adjacency(n: int, src, trg):
+    ''' return the symmetric, unweighted sparse adjacency matrix of the graph of n nodes and edge arrays src, trg. '''
+    src, trg = np.asarray(src, dtype=np.int64), np.asarray(trg, dtype=np.int64)
+    A = sp.csr_matrix((np.ones(2*len(src), dtype=np.int8), (np.concatenate([src, trg]), np.concatenate([trg, src]))),
+                      shape=(n, n))
+    A.sum_duplicates()
+    A.data[:] = 1
+    return A
+
+def bfs_distances(A, source) -> np.ndarray:
+    '''
+    return hop distances from source in the symmetric adjacency matrix A, -1 for unreachable nodes.
+    For an array of sources, one row of distances per source.
+    '''
+    dist = csgraph.shortest_path(A, directed=True, unweighted=True, indices=source)
+    return np.where(np.isinf(dist), -1, dist).astype(np.int64)
+
+def diameter_bounds(A, time_budget: float = None) -> Tuple[int, int]:
+    '''
+    return lower and upper bounds of the diameter of a connected, undirected graph
+    given by its symmetric sparse adjacency matrix A.
+    A double sweep gives the lower bound and the iFUB algorithm tightens the bounds
+    until they meet, or until time_budget seconds have passed.
+    '''
+    t0 = time.time()
+    A = sp.csr_matrix(A)
+    if A.shape[0] < 2:
+        return 0, 0
+    degree = np.diff(A.indptr)
+
+    #   double sweep from the highest degree node
+    dist = bfs_distances(A, int(np.argmax(degree)))
+    a = int(np.argmax(dist))
+    dist_a = bfs_distances(A, a)
+    b = int(np.argmax(dist_a))
+    lower = int(dist_a[b])
+
+    #   start iFUB from the highest degree node in the middle of the a-b shortest paths
+    dist_b = bfs_distances(A, b)
+    h = lower//2
+    middle = np.flatnonzero((dist_a == h) & (dist_b == lower-h))
+    u = int(middle[np.argmax(degree[middle])])
+    dist = bfs_distances(A, u)
+    ecc_u = int(dist.max())
+    lower, upper = max(lower, ecc_u), 2*ecc_u
+
+    #   eccentricities are calculated for blocks of nodes of at most about 2**22 distances
+    block = int(np.clip(2**22//A.shape[0], 1, 256))
+    i = ecc_u
+    while upper > lower and i > 0:
+        level = np.flatnonzero(dist == i)
+        for k in range(0, len(level), block):
+            if time_budget is not None and time.time()-t0 > time_budget:
+                return lower, upper
+            lower = max(lower, int(bfs_distances(A, level[k:k+block]).max()))
+        #   pairs of nodes below level i are at most 2*(i-1) apart
+        if lower > 2*(i-1):
+            return lower, lower
+        upper = 2*(i-1)
+        i -= 1
+
+    return lower, max(lower, upper)
+
+def pagerank_csr(n: int, src, trg, weight, alpha: float = 0.85, personalization=None,
+                 nstart=None, max_iter: int = 100, tol: float = 1.0e-6):
+    '''
+    return pagerank values of nodes 0..n-1 of the graph with the edge arrays src, trg and weight,
+    by power iteration on a sparse matrix. Same conventions as nx.pagerank:
+    dangling nodes, also nodes whose out-weights sum to 0, link according to the personalization vector.
+    '''
+    if n == 0:
+        return np.zeros(0)
+
+    src, trg = np.asarray(src), np.asarray(trg)
+    weight = np.asarray(weight, dtype=np.float64)
+    out_weight = np.bincount(src, weights=weight, minlength=n)
+
+    #   transposed, row stochastic matrix: x @ W == WT @ x.
+    #   Nodes without out-weight, e.g. with zero-weight links only, are dangling
+    dangling = out_weight == 0
+    inverse = np.zeros(n)
+    inverse[~dangling] = 1.0/out_weight[~dangling]
+    WT = sp.csr_matrix((weight*inverse[src], (trg, src)), shape=(n, n))
+
+    p = np.full(n, 1.0/n) if personalization is None else np.asarray(personalization, dtype=np.float64)
+    p = p/p.sum()
+    x = p.copy() if nstart is None else np.asarray(nstart, dtype=np.float64)
+    x = x/x.sum()
+
+    for _ in range(max_iter):
+        xlast = x
+        x = alpha*(WT @ xlast + xlast[dangling].sum()*p) + (1-alpha)*p
+        if np.abs(x-xlast).sum() < n*tol:
+            return x
+    raise nx.PowerIterationFailedConvergence(max_iter)
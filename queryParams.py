@@ -1,6 +1,15 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, asdict
 from networkbuilder import NetworkBuilder
+import graphSerializers
 from typing import Dict, Union
+import hashlib
+import json
+
+def toBool(value) -> bool:
+    ''' parse a boolean parameter, e.g. 'false' or '0' of a GET request '''
+    if isinstance(value, str):
+        return value.strip().lower() not in ('', '0', 'false', 'no', 'off')
+    return bool(value)
 
 @dataclass(eq=False)
 class QueryParams:
@@ -16,7 +25,49 @@ class QueryParams:
     removeMultipleLinks:bool    = True
     customHttpHeaders:Dict      = None
     adjust_layout:bool          = False
+    stream:bool                 = False
+    diameter_time_budget:float  = None
+    personalized_pagerank:bool  = False
+    compact_ids:str             = None
+    snapshot:str                = None
+    layout:str                  = None
+    layout_iterations:int       = 100
+    layout_time_budget:float    = None
+    precision:int               = None
+    timings:bool                = False
 
     def __post_init__(self):
         self.limit = int(self.limit)
         self.optimize = float(self.optimize)
+        if isinstance(self.log_level, str) and self.log_level.strip().isdigit():
+            self.log_level = int(self.log_level)
+        for name in ('removeMultipleLinks', 'adjust_layout', 'stream', 'personalized_pagerank', 'timings'):
+            setattr(self, name, toBool(getattr(self, name)))
+        self.compact_ids = self.compact_ids or None
+        if self.compact_ids is not None and self.compact_ids not in graphSerializers.COMPACT_IDS:
+            raise ValueError("Unknown compact_ids '{}', expected one of {}".format(self.compact_ids, ', '.join(graphSerializers.COMPACT_IDS)))
+        if self.diameter_time_budget is not None:
+            self.diameter_time_budget = float(self.diameter_time_budget)
+        self.layout_iterations = int(self.layout_iterations)
+        if self.precision is not None:
+            self.precision = int(self.precision)
+        if self.layout_time_budget is not None:
+            self.layout_time_budget = float(self.layout_time_budget)
+
+    def cacheKey(self) -> str:
+        '''
+        Hash of the parameters affecting the query result, e.g. for caching responses
+        '''
+        dct = asdict(self)
+        dct.pop('log_level', None)
+        dct = dict([(k, v.strip() if isinstance(v, str) else v) for k,v in dct.items()])
+        return hashlib.sha256(json.dumps(dct, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+    def layoutKey(self) -> str:
+        '''
+        Hash of the parameters identifying the nodes of a query and its ego, e.g. for reusing node positions
+        between the views of different limits
+        '''
+        dct = dict([(k, getattr(self, k)) for k in ('endpoint', 'nodes', 'links', 'prefixes', 'id', 'compact_ids', 'snapshot')])
+        dct = dict([(k, v.strip() if isinstance(v, str) else v) for k,v in dct.items()])
+        return hashlib.sha256(json.dumps(dct, sort_keys=True, default=str).encode('utf-8')).hexdigest()
@@ -0,0 +1,138 @@
+'''
+Created on 18.10.2026
+# coding: utf-8
+'''
+
+from collections import OrderedDict
+from dataclasses import dataclass, field
+import gzip
+import hashlib
+import logging
+import threading
+import time
+from typing import Dict, Optional, Union
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+LOGGER = logging.getLogger(__name__)
+
+#   content encodings in the order of preference
+ENCODINGS = ['br', 'gzip'] if brotli is not None else ['gzip']
+
+
+def compress(data: bytes, encoding: str) -> bytes:
+    if encoding == 'br':
+        return brotli.compress(data, quality=5)
+    return gzip.compress(data, compresslevel=6)
+
+
+@dataclass
+class CachedResponse:
+    body: bytes
+    mimetype: str
+    etag: str
+    created: float
+    encoded: Dict[str, bytes] = field(default_factory=dict, repr=False)
+
+    @classmethod
+    def fromBody(cls, body: Union[bytes, str], mimetype: str) -> 'CachedResponse':
+        if isinstance(body, str):
+            body = body.encode('utf-8')
+        return cls(body=body, mimetype=mimetype, etag=hashlib.sha1(body).hexdigest(), created=time.time())
+
+    @property
+    def size(self) -> int:
+        '''
+        Bytes held by the entry, the body and its compressed variants
+        '''
+        return len(self.body)+sum(len(v) for v in self.encoded.values())
+
+    def encode(self, encoding: str) -> bytes:
+        '''
+        The body compressed with the content encoding, compressed once per entry
+        '''
+        data = self.encoded.get(encoding)
+        if data is None:
+            data = self.encoded[encoding] = compress(self.body, encoding)
+        return data
+
+
+class ResponseCache:
+    '''
+    In-memory LRU cache of serialized responses with a time-to-live.
+    Entries are keyed by a normalized query string, e.g. QueryParams.cacheKey().
+    The entries hold at most max_bytes together with their compressed variants,
+    and bodies larger than max_entry_bytes are not cached.
+    '''
+
+    def __init__(self, maxsize: int = 128, ttl: float = 600.0,
+                 max_bytes: int = 256*1024*1024, max_entry_bytes: int = 16*1024*1024) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = max_entry_bytes
+        self.__items = OrderedDict()
+        self.__lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        if self.maxsize <= 0:
+            return None
+
+        with self.__lock:
+            entry = self.__items.get(key)
+            if entry is None:
+                return None
+
+            if self.ttl and time.time()-entry.created > self.ttl:
+                del self.__items[key]
+                return None
+
+            self.__items.move_to_end(key)
+            return entry
+
+    def set(self, key: str, body: Union[bytes, str], mimetype: str) -> CachedResponse:
+        entry = CachedResponse.fromBody(body, mimetype)
+        if self.maxsize <= 0 or len(entry.body) > self.max_entry_bytes:
+            return entry
+
+        with self.__lock:
+            self.__items[key] = entry
+            self.__items.move_to_end(key)
+            self.__trim()
+
+        return entry
+
+    def encode(self, entry: CachedResponse, encoding: str) -> bytes:
+        '''
+        The body of the entry compressed with the content encoding, the cache is trimmed to max_bytes
+        as the compressed variant is kept with the entry
+        '''
+        known = encoding in entry.encoded
+        data = entry.encode(encoding)
+        if not known:
+            with self.__lock:
+                self.__trim()
+        return data
+
+    def nbytes(self) -> int:
+        with self.__lock:
+            return sum(entry.size for entry in self.__items.values())
+
+    def __trim(self) -> None:
+        '''
+        Drop the least recently used entries beyond maxsize and max_bytes, called with the lock held
+        '''
+        total = sum(entry.size for entry in self.__items.values())
+        while self.__items and (len(self.__items) > self.maxsize or total > self.max_bytes):
+            _, entry = self.__items.popitem(last=False)
+            total -= entry.size
+
+    def clear(self) -> None:
+        with self.__lock:
+            self.__items.clear()
+
+    def __len__(self) -> int:
+        return len(self.__items)
@@ -0,0 +1,61 @@
+'''
+Created on 18.10.2026
+# coding: utf-8
+'''
+
+from dataclasses import dataclass, field
+import logging
+import threading
+from typing import Any, Callable, Dict, Hashable
+
+LOGGER = logging.getLogger(__name__)
+
+
+@dataclass
+class _Call:
+    done: threading.Event = field(default_factory=threading.Event)
+    result: Any = None
+    error: BaseException = None
+    waiters: int = 0
+
+
+class SingleFlight:
+    '''
+    Coalescing of identical concurrent calls: while a call for a key is in flight,
+    later calls with the same key wait for it and receive its result or exception.
+    '''
+
+    def __init__(self) -> None:
+        self.__calls: Dict[Hashable, _Call] = {}
+        self.__lock = threading.Lock()
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        with self.__lock:
+            call = self.__calls.get(key)
+            leader = call is None
+            if leader:
+                call = self.__calls[key] = _Call()
+            else:
+                call.waiters += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self.__lock:
+                del self.__calls[key]
+            if call.waiters:
+                LOGGER.debug("Shared the result with {} waiting calls".format(call.waiters))
+            call.done.set()
+
+    def __len__(self) -> int:
+        return len(self.__calls)
@@ -0,0 +1,152 @@
+'''
+Created on 18.10.2026
+# coding: utf-8
+'''
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import zlib
+from typing import Callable, Dict, Optional
+
+LOGGER = logging.getLogger(__name__)
+
+
+class SparqlCache:
+    '''
+    Persistent cache of SPARQL query results in a SQLite file.
+    The file is shared by all processes using the same path, e.g. gunicorn workers.
+    Entries are keyed by endpoint, query and custom HTTP headers, expire after
+    a per-endpoint time to live, and are evicted least recently used first
+    when the total size exceeds max_size bytes.
+    '''
+
+    def __init__(self, path: str, max_size: int = 256*2**20, ttl: float = 3600.0,
+                 endpoint_ttl: Dict[str, float] = None) -> None:
+        self.path = path
+        self.max_size = max_size
+        self.ttl = ttl
+        self.endpoint_ttl = endpoint_ttl or {}
+        self.__local = threading.local()
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.path) and self.max_size > 0
+
+    def key(self, endpoint: str, query: str, customHttpHeaders: Dict = None) -> str:
+        headers = sorted((customHttpHeaders or {}).items())
+        return hashlib.sha256(json.dumps([endpoint, query, headers]).encode('utf-8')).hexdigest()
+
+    def get(self, endpoint: str, query: str, customHttpHeaders: Dict = None) -> Optional[Dict]:
+        if not self.enabled:
+            return None
+
+        key = self.key(endpoint, query, customHttpHeaders)
+        try:
+            con = self.__connection()
+            row = con.execute('SELECT created, value FROM results WHERE key=?', (key,)).fetchone()
+            if row is None:
+                return None
+
+            created, value = row
+            now = time.time()
+            if now-created > self.endpoint_ttl.get(endpoint, self.ttl):
+                with con:
+                    con.execute('DELETE FROM results WHERE key=?', (key,))
+                return None
+
+            with con:
+                con.execute('UPDATE results SET accessed=? WHERE key=?', (now, key))
+            return json.loads(zlib.decompress(value))
+
+        except sqlite3.Error as e:
+            LOGGER.warning("SPARQL cache read failed: {}".format(e))
+            return None
+
+    def set(self, endpoint: str, query: str, customHttpHeaders: Dict, results: Dict) -> None:
+        if not self.enabled:
+            return
+
+        key = self.key(endpoint, query, customHttpHeaders)
+        value = zlib.compress(json.dumps(results).encode('utf-8'))
+        if len(value) > self.max_size:
+            return
+
+        now = time.time()
+        try:
+            con = self.__connection()
+            with con:
+                con.execute('INSERT OR REPLACE INTO results VALUES (?,?,?,?,?,?)',
+                            (key, endpoint, now, now, len(value), value))
+                self.__evict(con)
+
+        except sqlite3.Error as e:
+            LOGGER.warning("SPARQL cache write failed: {}".format(e))
+
+    def cached(self, endpoint: str, query: str, customHttpHeaders: Dict, fetch: Callable[[], Dict]) -> Dict:
+        '''
+        Return the cached result of the query, or call fetch() and cache its result
+        '''
+        results = self.get(endpoint, query, customHttpHeaders)
+        if results is None:
+            results = fetch()
+            self.set(endpoint, query, customHttpHeaders, results)
+        else:
+            LOGGER.debug("SPARQL cache hit for {}".format(endpoint))
+        return results
+
+    def clear(self) -> None:
+        if not self.enabled:
+            return
+        con = self.__connection()
+        with con:
+            con.execute('DELETE FROM results')
+
+    def __evict(self, con: sqlite3.Connection) -> None:
+        total, = con.execute('SELECT COALESCE(SUM(size), 0) FROM results').fetchone()
+        if total <= self.max_size:
+            return
+        #   least recently used first, only as many as needed
+        evicted = []
+        for key, size in con.execute('SELECT key, size FROM results ORDER BY accessed'):
+            if total <= self.max_size:
+                break
+            evicted.append((key,))
+            total -= size
+        con.executemany('DELETE FROM results WHERE key=?', evicted)
+
+    def __connection(self) -> sqlite3.Connection:
+        '''
+        One connection per thread and process, connections must not cross a fork
+        '''
+        con = getattr(self.__local, 'con', None)
+        if con is not None and self.__local.pid == os.getpid():
+            return con
+
+        con = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        con.execute('PRAGMA journal_mode=WAL')
+        con.execute('PRAGMA synchronous=NORMAL')
+        con.execute('''CREATE TABLE IF NOT EXISTS results (
+                        key TEXT PRIMARY KEY,
+                        endpoint TEXT,
+                        created REAL,
+                        accessed REAL,
+                        size INTEGER,
+                        value BLOB)''')
+        con.execute('CREATE INDEX IF NOT EXISTS results_accessed ON results (accessed)')
+        con.isolation_level = ''
+        self.__local.con, self.__local.pid = con, os.getpid()
+        return con
+
+
+SPARQL_CACHE = SparqlCache(
+    path=os.environ.get('SPARQL_CACHE_PATH',
+                        os.path.join(tempfile.gettempdir(), 'sparql2graph_cache.sqlite3')),
+    max_size=int(float(os.environ.get('SPARQL_CACHE_SIZE_MB', 256))*2**20),
+    ttl=float(os.environ.get('SPARQL_CACHE_TTL', 3600)),
+    endpoint_ttl=json.loads(os.environ.get('SPARQL_CACHE_ENDPOINT_TTL', '{}')))
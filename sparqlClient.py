@@ -0,0 +1,185 @@
+'''
+Created on 18.10.2026
+# coding: utf-8
+'''
+
+import codecs
+import itertools
+import json
+import logging
+import os
+import re
+import threading
+from typing import Dict, Iterable, Iterator
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from sparqlCache import SPARQL_CACHE, SparqlCache
+
+LOGGER = logging.getLogger(__name__)
+
+BINDINGS_START = re.compile(r'"bindings"\s*:\s*\[')
+WHITESPACE = ' \t\n\r,'
+
+SPARQL_RESULTS_JSON = 'application/sparql-results+json,application/json;q=0.9'
+
+try:
+    import brotli   # noqa: F401, urllib3 decodes 'br' only if available
+    ACCEPT_ENCODING = 'gzip, deflate, br'
+except ImportError:
+    ACCEPT_ENCODING = 'gzip, deflate'
+
+
+class SparqlClient:
+    '''
+    SPARQL protocol client keeping a pool of at most pool_size keep-alive connections per endpoint host,
+    shared by the threads. A thread waits for a free connection if all are in use.
+    Results are read through the shared SparqlCache.
+    '''
+
+    def __init__(self, pool_size: int = 10, connect_timeout: float = 10.0,
+                 read_timeout: float = 300.0, cache: SparqlCache = None) -> None:
+        self.pool_size = pool_size
+        self.timeout = (connect_timeout, read_timeout)
+        self.cache = cache
+        self.__sessions = {}
+        self.__pid = os.getpid()
+        self.__lock = threading.Lock()
+
+    def query(self, endpoint: str, query: str, customHttpHeaders: Dict = None,
+              method: str = 'POST', timeout: float = None) -> Dict:
+        '''
+        Return the SPARQL JSON result of the query, i.e. {'head': ..., 'results': {'bindings': [...]}}
+        '''
+        if self.cache is None:
+            return self.__fetch(endpoint, query, customHttpHeaders, method, timeout)
+        return self.cache.cached(endpoint, query, customHttpHeaders,
+                                 lambda: self.__fetch(endpoint, query, customHttpHeaders, method, timeout))
+
+    def iterate(self, endpoint: str, query: str, customHttpHeaders: Dict = None,
+                method: str = 'POST', chunk_size: int = 2**16) -> Iterator[Dict]:
+        '''
+        Yield the result bindings one by one while the response is being received.
+        A cached result is used if available, streamed results are not cached.
+        '''
+        if self.cache is not None:
+            results = self.cache.get(endpoint, query, customHttpHeaders)
+            if results is not None:
+                yield from results['results']['bindings']
+                return
+
+        response = self.request(endpoint, query, customHttpHeaders, method, stream=True)
+        try:
+            yield from iterBindings(response.iter_content(chunk_size=chunk_size))
+        finally:
+            response.close()
+
+    def request(self, endpoint: str, query: str, customHttpHeaders: Dict = None,
+                method: str = 'POST', stream: bool = False, timeout: float = None) -> requests.Response:
+        '''
+        Send the query and return the raw HTTP response, timeout overrides the read timeout
+        '''
+        timeout = self.timeout if timeout is None else (self.timeout[0], timeout)
+        headers = {'Accept': SPARQL_RESULTS_JSON, 'Accept-Encoding': ACCEPT_ENCODING}
+        if customHttpHeaders:
+            headers.update(customHttpHeaders)
+
+        session = self.session(endpoint)
+        if method.upper() == 'GET':
+            response = session.get(endpoint, params={'query': query}, headers=headers,
+                                   timeout=timeout, stream=stream)
+        else:
+            response = session.post(endpoint, data={'query': query}, headers=headers,
+                                    timeout=timeout, stream=stream)
+        response.raise_for_status()
+        return response
+
+    def session(self, endpoint: str) -> requests.Session:
+        '''
+        Return the session of the endpoint host, sessions are not shared over a fork.
+        The connection pool of urllib3 is thread-safe, and the session only sends the requests.
+        '''
+        url = urlsplit(endpoint)
+        host = '{}://{}'.format(url.scheme, url.netloc)
+
+        with self.__lock:
+            if self.__pid != os.getpid():
+                self.__sessions, self.__pid = {}, os.getpid()
+
+            session = self.__sessions.get(host)
+            if session is None:
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size, pool_block=True)
+                session = requests.Session()
+                session.mount(host, adapter)
+                session.headers['User-Agent'] = 'Sparql2GraphServer'
+                self.__sessions[host] = session
+        return session
+
+    def close(self) -> None:
+        with self.__lock:
+            for session in self.__sessions.values():
+                session.close()
+            self.__sessions = {}
+
+    def __fetch(self, endpoint: str, query: str, customHttpHeaders: Dict, method: str, timeout: float) -> Dict:
+        return self.request(endpoint, query, customHttpHeaders, method, timeout=timeout).json()
+
+
+def iterBindings(chunks: Iterable[bytes]) -> Iterator[Dict]:
+    '''
+    Incrementally parse the 'bindings' array of a SPARQL JSON result from byte chunks,
+    only the binding currently being parsed is kept in memory
+    '''
+    decoder = json.JSONDecoder()
+    utf8 = codecs.getincrementaldecoder('utf-8')()
+    buf, pos, started = '', 0, False
+    #   received text not yet appended to buf, and the length of the unparsed text needed for the next attempt
+    pending, pending_len, need = [], 0, 0
+
+    for chunk in itertools.chain(chunks, [None]):
+        if chunk is not None:
+            text = utf8.decode(chunk)
+            pending.append(text)
+            pending_len += len(text)
+            #   a binding spanning several chunks is parsed again only once the text has doubled
+            if len(buf)-pos+pending_len < need:
+                continue
+
+        buf = buf[pos:] + ''.join(pending)
+        pos, pending, pending_len, need = 0, [], 0, 0
+
+        if not started:
+            m = BINDINGS_START.search(buf)
+            if m is None:
+                #   keep the tail in case the key is split between chunks
+                pos = max(0, len(buf)-64)
+                continue
+            started, pos = True, m.end()
+
+        while True:
+            while pos < len(buf) and buf[pos] in WHITESPACE:
+                pos += 1
+            if pos >= len(buf):
+                break
+            if buf[pos] == ']':
+                return
+            try:
+                ob, pos = decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                #   incomplete binding, wait for more chunks
+                need = 2*(len(buf)-pos)
+                break
+            yield ob
+
+    if not started:
+        raise ValueError('No result bindings found in the SPARQL response')
+    raise ValueError('Truncated SPARQL response')
+
+
+SPARQL_CLIENT = SparqlClient(
+    pool_size=int(os.environ.get('SPARQL_POOL_SIZE', 10)),
+    connect_timeout=float(os.environ.get('SPARQL_CONNECT_TIMEOUT', 10)),
+    read_timeout=float(os.environ.get('SPARQL_READ_TIMEOUT', 300)),
+    cache=SPARQL_CACHE)
@@ -0,0 +1,38 @@
+'''
+Created on 18.10.2026
+# coding: utf-8
+'''
+
+import os
+import sys
+
+#   no disk-backed SPARQL result cache in the tests
+os.environ.setdefault('SPARQL_CACHE_PATH', '')
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+from fakeSparqlEndpoint import EmloData, FakeSparqlEndpoint, emloQueries
+
+
+@pytest.fixture(scope='session')
+def data() -> EmloData:
+    '''
+    Synthetic EMLO-shaped network served by the endpoint fixture
+    '''
+    return EmloData(links=1000, seed=4)
+
+
+@pytest.fixture(scope='session')
+def endpoint(data):
+    with FakeSparqlEndpoint(data) as endpoint:
+        yield endpoint
+
+
+@pytest.fixture(scope='session')
+def queries():
+    '''
+    The prefixes, nodes and links queries of example_queries/emlo
+    '''
+    return emloQueries()
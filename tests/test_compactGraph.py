@@ -0,0 +1,69 @@
+'''
+Created on 18.10.2026
+# coding: utf-8
+'''
+
+import networkx as nx
+import numpy as np
+
+from compactGraph import CompactGraph
+
+
+def sampleGraph() -> CompactGraph:
+    G = CompactGraph()
+    G.add_node('a')
+    G.set_node_attr('a', 'name', 'A')
+    G.add_edge('a', 'b', {'weight': 2, 'start': '1600'})
+    G.add_edge('b', 'c', {'weight': 0, 'label': 'x'})
+    G.add_edge('c', 'd')
+    G.add_edge('d', 'a', {'weight': 3})
+    G.set_node_attr('d', 'name', 'D')
+    return G
+
+
+def test_edges_and_attributes():
+    G = sampleGraph()
+    assert G.nodes == ['a', 'b', 'c', 'd'] and G.number_of_edges() == 4
+    assert G.has_edge('a', 'b') and not G.has_edge('b', 'a') and not G.has_edge('a', 'x')
+    assert G.src.dtype == np.int32 and G.src.tolist() == [0, 1, 2, 3] and G.trg.tolist() == [1, 2, 3, 0]
+
+    #   columns are filled with None for the nodes and edges without the attribute, falsy values skipped
+    assert G.node_attrs['name'] == ['A', None, None, 'D']
+    assert G.edge_attrs['weight'] == [2, None, None, 3]
+    assert G.edge_attrs['label'] == [None, 'x', None, None]
+
+    #   an existing edge is updated
+    assert G.add_edge('a', 'b', {'weight': 5}) == 0
+    assert G.number_of_edges() == 4 and G.edge_data(0) == {'weight': 5, 'start': '1600'}
+
+    src, trg, weight = G.edgeArrays()
+    assert weight.tolist() == [5, 1, 1, 3] and weight.dtype == np.int64
+    assert G.degree().tolist() == [2, 2, 2, 2]
+
+
+def test_remove_nodes_reindexes():
+    G = sampleGraph()
+    G.add_edge('e', 'c', {'weight': 4})
+    G.remove_nodes([G.index['b'], G.index['d']])
+
+    assert G.nodes == ['a', 'c', 'e'] and G.index == {'a': 0, 'c': 1, 'e': 2}
+    assert list(zip(G.src.tolist(), G.trg.tolist())) == [(2, 1)]
+    assert G.has_edge('e', 'c') and not G.has_edge('a', 'b')
+    assert G.node_attrs['name'] == ['A', None, None]
+    assert G.edge_attrs['weight'] == [4]
+
+    #   edges can be added after removing nodes
+    G.add_edge('a', 'c')
+    assert G.src.tolist() == [2, 0] and G.has_edge('a', 'c')
+
+
+def test_components_and_networkx():
+    G = sampleGraph()
+    G.add_edge('x', 'y')
+    assert G.weakly_connected_components().tolist() == [0, 0, 0, 0, 1, 1]
+
+    H = G.to_networkx()
+    assert list(H.nodes) == G.nodes
+    assert H.nodes['a'] == {'name': 'A'}
+    assert H['a']['b'] == {'weight': 2, 'start': '1600'}
+    assert nx.number_weakly_connected_components(H) == 2
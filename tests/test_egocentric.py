@@ -0,0 +1,49 @@
+'''
+Created on 18.10.2026
+# coding: utf-8
+'''
+
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+#   records the id chunks queried by an egocentric and a batch query against the fake endpoint
+SCRIPT = '''
+import json, logging
+from fakeSparqlEndpoint import EmloData, FakeSparqlEndpoint
+from networkbuilder import NetworkBuilder
+from queryParams import QueryParams
+
+NetworkBuilder.CHUNK_SIZE = 20
+nb = NetworkBuilder()
+chunks = []
+queryInChunks = nb.queryInChunks
+def recordChunks(query, placeholder, ids, *args):
+    chunks.append(list(ids))
+    return queryInChunks(query, placeholder, ids, *args)
+nb.queryInChunks = recordChunks
+
+data = EmloData(links=2000, seed=3)
+read = lambda name: open('example_queries/emlo/'+name).read()
+with FakeSparqlEndpoint(data) as endpoint:
+    opts = QueryParams(endpoint=endpoint.url, prefixes=read('prefices.sparql'), nodes=read('nodes.sparql'),
+                       links=read('links_ego.sparql'), id=data.ids[-1], limit=200, log_level=logging.WARNING)
+    nodes, links = nb.egocentric(opts)
+    batch = nb.egocentricBatch(opts, data.ids[-3:])
+print(json.dumps({'chunks': chunks, 'nodes': nodes, 'links': links, 'batch': batch}))
+'''
+
+
+def run(seed: str) -> dict:
+    env = dict(os.environ, PYTHONHASHSEED=seed, SPARQL_CACHE_PATH='')
+    out = subprocess.run([sys.executable, '-c', SCRIPT], cwd=ROOT, env=env, capture_output=True, check=True)
+    return json.loads(out.stdout)
+
+
+def test_egocentric_independent_of_hash_seed():
+    first, second = run('1'), run('2')
+    assert len(first['chunks']) > 2
+    assert first == second
@@ -0,0 +1,77 @@
+'''
+Created on 18.10.2026
+# coding: utf-8
+'''
+
+from collections import defaultdict
+import random
+
+import pytest
+
+from networkbuilder import NetworkBuilder
+from queryParams import QueryParams
+
+
+def baselineCoCo(ids, res, N):
+    '''
+    The original greedy expansion: add the candidate with the largest summed link weight
+    to the current nodes, the first one found on ties
+    '''
+    nodes = list(ids)
+    edges = []
+
+    filter_source = lambda ob: ob.get('source') in nodes and (not ob.get('target') in nodes)
+    filter_target = lambda ob: ob.get('target') in nodes and (not ob.get('source') in nodes)
+
+    for _ in range(1,N):
+        dc = defaultdict(int)
+        for ob in filter(filter_target, res):
+            dc[ob.get('source')] += ob.get('weight')
+        for ob in filter(filter_source, res):
+            dc[ob.get('target')] += ob.get('weight')
+
+        if dc:
+            new_node, _ = max(dc.items(), key = lambda x:x[1])
+            nodes.append(new_node)
+            for ob in res:
+                if ob.get('source') in nodes and ob.get('target') in nodes and ob not in edges:
+                    edges.append(ob)
+        else:
+            break
+
+    return nodes, edges
+
+
+def randomRows(seed, n=40, m=150):
+    rnd = random.Random(seed)
+    rows = [{'source': 'n{}'.format(rnd.randrange(n)), 'target': 'n{}'.format(rnd.randrange(n)),
+             'weight': rnd.choice([1, 1, 2])} for _ in range(m)]
+    #   repeated rows and links between the initial nodes
+    return rows + rows[:5] + [{'source': 'n0', 'target': 'n1', 'weight': 1}]
+
+
+def coco(rows, ids, limit):
+    nb = NetworkBuilder()
+    nb.makeSparqlQuery = lambda *args, **kwargs: rows
+    opts = QueryParams(endpoint='', nodes='', links='<ID>', id=' '.join(ids), limit=limit)
+    return nb.egocentricCoCo(opts)
+
+
+@pytest.mark.parametrize('seed', range(10))
+@pytest.mark.parametrize('ids', [['n0'], ['n0', 'n1']])
+def test_matches_baseline(seed, ids):
+    rows = randomRows(seed)
+    assert coco(rows, ids, 25) == baselineCoCo(ids, rows, 25)
+
+
+def test_ties():
+    #   equal weights: candidates linking to the nodes come first, then in the order of the rows
+    rows = [{'source': 'a', 'target': 'b', 'weight': 1},
+            {'source': 'c', 'target': 'a', 'weight': 1},
+            {'source': 'a', 'target': 'd', 'weight': 1},
+            {'source': 'e', 'target': 'b', 'weight': 1},
+            {'source': 'd', 'target': 'e', 'weight': 1},
+            {'source': 'c', 'target': 'c', 'weight': 5}]
+    nodes, edges = coco(rows, ['a'], 10)
+    assert (nodes, edges) == baselineCoCo(['a'], rows, 10)
+    assert nodes == ['a', 'c', 'b', 'e', 'd']
@@ -0,0 +1,130 @@
+'''
+Created on 18.10.2026
+# coding: utf-8
+'''
+
+import json
+import math
+import os
+import shutil
+import struct
+import subprocess
+
+import numpy as np
+import pytest
+
+from compactGraph import CompactGraph
+import graphSerializers
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def sampleGraph() -> CompactGraph:
+    G = CompactGraph()
+    for i, n in enumerate(['http://a/1', 'http://a/2', 'http://a/ä', 'http://b/<&>"']):
+        G.add_node(n)
+        G.set_node_attr(n, 'degree', i)
+        G.set_node_attr(n, 'pagerank', 0.25*i+0.1)
+        if i % 2:
+            G.set_node_attr(n, 'class', 'Person & "Group"')
+            G.set_node_attr(n, 'flag', i == 1)
+    G.add_edge('http://a/1', 'http://a/2', {'weight': 2, 'start': '1650-01-01'})
+    G.add_edge('http://a/2', 'http://a/ä', {'weight': 1})
+    G.add_edge('http://b/<&>"', 'http://a/1', {'weight': 3, 'start': '1700'})
+    return G
+
+
+def fromBinary(data: bytes) -> dict:
+    '''
+    Decode the binary format like cytoscape/js/binaryGraph.js
+    '''
+    assert data[:4] == graphSerializers.BINARY_MAGIC
+    version, length = struct.unpack('<II', data[4:12])
+    graph = json.loads(data[12:12+length])
+    assert version == graph['version'] == graphSerializers.BINARY_VERSION
+
+    def array(desc):
+        assert desc['offset'] % 8 == 0
+        return np.frombuffer(data, dtype=np.dtype(desc['dtype']).newbyteorder('<'),
+                             count=desc['length'], offset=desc['offset'])
+
+    def column(desc):
+        if desc['type'] == 'json':
+            return desc['values']
+        arr = array(desc)
+        if desc['type'] == 'string':
+            return [None if c < 0 else desc['values'][c] for c in arr]
+        return [None if isinstance(v, float) and math.isnan(v) else v for v in arr.tolist()]
+
+    graph['src'], graph['trg'] = array(graph['src']).tolist(), array(graph['trg']).tolist()
+    for key in ('node_columns', 'edge_columns'):
+        graph[key] = dict((k, column(desc)) for k, desc in graph[key].items())
+    return graph
+
+
+def test_binary_round_trip():
+    G = sampleGraph()
+    graph = fromBinary(graphSerializers.toBinary(G, {'diameter': 2}, {'prefixes': {'a': 'http://a/'}}))
+
+    assert graph['ids'] == G.nodes
+    assert graph['metrics'] == {'diameter': 2}
+    assert graph['prefixes'] == {'a': 'http://a/'}
+    assert (graph['src'], graph['trg']) == (list(G.src), list(G.trg))
+    assert graph['node_columns'] == G.node_attrs
+    assert graph['edge_columns'] == G.edge_attrs
+
+
+@pytest.mark.skipif(shutil.which('node') is None, reason='node.js not installed')
+def test_binary_javascript_decoder():
+    G = sampleGraph()
+    data = graphSerializers.toBinary(G)
+    script = '''
+        const fs = require('fs');
+        eval(fs.readFileSync('cytoscape/js/binaryGraph.js', 'utf8'));
+        const b = fs.readFileSync(0);
+        const graph = decodeGraph(b.buffer.slice(b.byteOffset, b.byteOffset+b.length));
+        process.stdout.write(JSON.stringify(toElements(graph)));
+    '''
+    out = subprocess.run(['node', '-e', script], input=data, cwd=ROOT, capture_output=True, check=True)
+    elements = json.loads(out.stdout)
+
+    nodes = [G.node_data(i) for i in range(G.number_of_nodes())]
+    assert [ob['data']['id'] for ob in elements['nodes']] == G.nodes
+    for ob, expected in zip(elements['nodes'], nodes):
+        assert dict((k, v) for k, v in ob['data'].items() if k not in ('id', 'value', 'name')) == \
+            dict((k, v) for k, v in expected.items() if v is not None)
+    assert [(ob['data']['source'], ob['data']['target'], ob['data']['weight']) for ob in elements['edges']] == \
+        [(G.nodes[s], G.nodes[t], w) for s, t, w in zip(G.src, G.trg, G.edge_attrs['weight'])]
+
+
+def test_graphml_parses():
+    import networkx as nx
+
+    G = sampleGraph()
+    graph_attrs = {'prefixes': json.dumps({'a': 'http://a/'}), 'exact': True, 'diameter': 2}
+    H = nx.parse_graphml(''.join(graphSerializers.iterGraphml(G, graph_attrs)))
+    expected = G.to_networkx()
+
+    assert list(H.nodes()) == G.nodes
+    assert dict((k, v) for k, v in H.graph.items() if k not in ('node_default', 'edge_default')) == graph_attrs
+    for n, data in expected.nodes(data=True):
+        assert H.nodes[n] == dict((k, v) for k, v in data.items() if v is not None)
+    assert list(H.edges()) == list(expected.edges())
+    for u, v, data in expected.edges(data=True):
+        assert H.edges[u, v] == dict((k, w) for k, w in data.items() if w is not None)
+    assert H.nodes['http://a/2']['flag'] is True and H.nodes['http://b/<&>"']['flag'] is False
+
+
+def test_cytoscape_json_matches_networkx():
+    from networkx.readwrite import json_graph
+
+    G = sampleGraph()
+    G.set_node_attr('http://a/1', 'name', 'Nimi "ä"')
+    G.set_node_attr('http://a/2', 'x', -0.5)
+    metrics = {'diameter': 2, 'diameter_exact': True, 'average_degree': 1.5}
+    tables = {'prefixes': {'a': 'http://a/'}}
+
+    expected = json_graph.cytoscape_data(G.to_networkx())
+    expected['metrics'] = metrics
+    expected.update(tables)
+    assert json.loads(graphSerializers.cytoscapeJson(G, metrics, tables)) == expected
@@ -0,0 +1,58 @@
+'''
+Created on 18.10.2026
+# coding: utf-8
+'''
+
+import os
+import subprocess
+import sys
+
+import pytest
+from prometheus_client.parser import text_string_to_metric_families
+
+import instrumentation
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+OBSERVE = '''
+import instrumentation
+with instrumentation.request('query'):
+    instrumentation.observeTime('fetch_depth_1', 0.2, 'fetch_depth')
+    instrumentation.observeSize('nodes', 100)
+'''
+
+
+def samples(text: str, name: str):
+    return dict((tuple(sorted(s.labels.items())), s.value)
+                for family in text_string_to_metric_families(text)
+                for s in family.samples if s.name == name)
+
+
+def test_request_record():
+    with instrumentation.request('query') as record:
+        with instrumentation.stage('build'):
+            pass
+        instrumentation.observeTime('fetch_depth_1', 0.5, 'fetch_depth')
+        instrumentation.observeTime('fetch_depth_1', 0.25, 'fetch_depth')
+        instrumentation.observeSize('rows', 10)
+    assert instrumentation.current() is None
+    assert record.timings['fetch_depth_1'] == 0.75
+    assert set(record.asdict()['timings']) == {'build', 'fetch_depth_1'}
+    assert record.asdict()['sizes'] == {'rows': 10}
+
+    text = instrumentation.exposition().decode('utf-8')
+    assert samples(text, 'sparql2graph_stage_seconds_count')[(('stage', 'fetch_depth'),)] >= 2
+    assert samples(text, 'sparql2graph_request_seconds_count')[(('route', 'query'),)] >= 1
+
+
+def test_exposition_sums_worker_processes(tmp_path):
+    env = dict(os.environ, PROMETHEUS_MULTIPROC_DIR=str(tmp_path), PYTHONPATH=ROOT)
+    for _ in range(3):
+        subprocess.run([sys.executable, '-c', OBSERVE], env=env, cwd=ROOT, check=True)
+
+    text = subprocess.run([sys.executable, '-c', 'import instrumentation, sys; sys.stdout.buffer.write(instrumentation.exposition())'],
+                          env=env, cwd=ROOT, check=True, capture_output=True).stdout.decode('utf-8')
+    assert samples(text, 'sparql2graph_stage_seconds_count') == {(('stage', 'fetch_depth'),): 3}
+    assert samples(text, 'sparql2graph_stage_seconds_sum')[(('stage', 'fetch_depth'),)] == pytest.approx(0.6)
+    assert samples(text, 'sparql2graph_size_bucket')[(('kind', 'nodes'), ('le', '100.0'))] == 3
+    assert samples(text, 'sparql2graph_request_seconds_count') == {(('route', 'query'),): 3}
@@ -0,0 +1,128 @@
+'''
+Created on 18.10.2026
+# coding: utf-8
+'''
+
+from concurrent.futures import Future
+
+import numpy as np
+import pytest
+
+import layout
+
+
+def test_grid_repulsion_blocks(monkeypatch):
+    pos = np.random.default_rng(1).normal(size=(3000, 2))
+    k = np.sqrt(1/len(pos))
+    expected = layout._grid_repulsion(pos, k)
+
+    #   the blocks do not change the result
+    monkeypatch.setattr(layout, 'BLOCK_SIZE', 1000)
+    assert np.allclose(layout._grid_repulsion(pos, k), expected)
+
+
+def test_grid_repulsion_approximates_exact():
+    pos = np.random.default_rng(2).uniform(-1, 1, size=(2000, 2))
+    k = np.sqrt(1/len(pos))
+    exact = layout._exact_repulsion(pos, k)
+    grid = layout._grid_repulsion(pos, k)
+    assert np.median(np.linalg.norm(grid-exact, axis=1)/np.linalg.norm(exact, axis=1)) < 0.2
+
+
+def test_force_layout_fixed():
+    n = 1500
+    rng = np.random.default_rng(3)
+    src, trg = rng.integers(0, n, 3000), rng.integers(0, n, 3000)
+    pos = rng.uniform(-1, 1, size=(n, 2))
+    fixed = np.zeros((n, 2), dtype=bool)
+    fixed[:10] = True
+    fixed[10:20, 0] = True
+
+    res = layout.force_layout(n, src, trg, pos=pos, fixed=fixed, iterations=20, seed=1)
+    assert res.shape == (n, 2) and np.isfinite(res).all()
+    assert np.array_equal(res[fixed], pos[fixed])
+    assert not np.array_equal(res[20:], pos[20:])
+
+
+def test_layout_cache_replaces_entries():
+    cache = layout.LayoutCache(maxsize=2)
+    cache.set('a', {'n1': (0.0, 0.0), 'n2': (1.0, 1.0)})
+    cache.set('a', {'n3': (0.5, 0.5)})
+    assert cache.get('a') == {'n3': (0.5, 0.5)}
+    cache.set('b', {})
+    cache.set('c', {})
+    assert cache.get('a') is None
+
+
+def test_layout_key_by_ego():
+    from queryParams import QueryParams
+    opts = QueryParams(endpoint='e', nodes='n', links='l', id='a', limit=10)
+    assert opts.layoutKey() == QueryParams(endpoint='e', nodes='n', links='l', id='a', limit=50).layoutKey()
+    assert opts.layoutKey() != QueryParams(endpoint='e', nodes='n', links='l', id='b', limit=10).layoutKey()
+
+
+def test_incremental_layout():
+    import networkx as nx
+    from networkbuilder import NetworkBuilder
+
+    nb = NetworkBuilder()
+    layout.LAYOUT_CACHE.clear()
+    G = nx.gnm_random_graph(60, 120, seed=1)
+    first = nb.adjustPositions(G.copy(), iterations=20, cache_key='0123456789abcdef')
+
+    #   the same layout from scratch, e.g. in another worker
+    layout.LAYOUT_CACHE.clear()
+    assert nb.adjustPositions(G.copy(), iterations=20, cache_key='0123456789abcdef') == first
+
+    #   an expanded view keeps the positions of the previous one
+    H = G.copy()
+    H.add_edges_from([(0, 100), (100, 101)])
+    second = nb.adjustPositions(H, iterations=20, cache_key='0123456789abcdef')
+    assert all(second[v] == first[v] for v in G)
+    assert layout.LAYOUT_CACHE.get('0123456789abcdef') == second
+
+
+def test_coarsen_isolated_nodes():
+    #   a path of 10 nodes and 10 isolated nodes: the isolated ones stay single
+    src, trg = np.arange(9), np.arange(1, 10)
+    k, group, csrc, ctrg, cweight = layout.coarsen(20, src, trg, np.ones(9))
+    assert 10 < k < 20
+    assert len(set(group[10:].tolist())) == 10
+    assert (csrc < ctrg).all() and (cweight > 0).all()
+
+
+def test_multilevel_layout_terminates(monkeypatch):
+    monkeypatch.setattr(layout, 'COARSEST_MAX_NODES', 20)
+    rng = np.random.default_rng(1)
+    n = 400
+    #   a random graph on half of the nodes, the rest isolated, so that coarsening stalls
+    src, trg = rng.integers(0, n//2, 600), rng.integers(0, n//2, 600)
+    pos = layout.multilevel_layout(n, src, trg, iterations=20, seed=1)
+    assert pos.shape == (n, 2)
+    assert np.isfinite(pos).all()
+    assert np.abs(pos).max() == 1.0
+
+    assert layout.multilevel_layout(3, [], [], iterations=5, seed=1).shape == (3, 2)
+    assert np.array_equal(pos, layout.multilevel_layout(n, src, trg, iterations=20, seed=1))
+
+
+@pytest.mark.parametrize('n, expected', [(30, 'force_layout'), (31, 'multilevel_layout')])
+def test_multilevel_by_default_above_min_nodes(monkeypatch, n, expected):
+    import networkx as nx
+    import networkbuilder
+    from networkbuilder import NetworkBuilder
+
+    called = []
+
+    def submit(fn, *args, **kwargs):
+        called.append(fn.__name__)
+        future = Future()
+        future.set_result(fn(*args, **kwargs))
+        return future
+    monkeypatch.setattr(networkbuilder.METRIC_POOL, 'submit', submit)
+    monkeypatch.setattr(layout, 'MULTILEVEL_MIN_NODES', 30)
+
+    G = nx.gnm_random_graph(n, 2*n, seed=1)
+    pos = NetworkBuilder().adjustPositions(G, iterations=10)
+    assert called == [expected]
+    assert len(pos) == n
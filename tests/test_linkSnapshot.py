@@ -0,0 +1,57 @@
+'''
+Created on 18.10.2026
+# coding: utf-8
+'''
+
+import random
+
+import pytest
+
+import linkSnapshot
+
+NODES = ['http://example.org/id/{}'.format(i) for i in range(30)] + ['http://example.org/id/ä', 'http://example.org/x']
+
+
+def randomLinks(seed, m=200):
+    rnd = random.Random(seed)
+    return [{'source': rnd.choice(NODES), 'target': rnd.choice(NODES), 'weight': rnd.randint(1, 3),
+             'start': '16{:02d}-01-01'.format(i % 100)} for i in range(m)]
+
+
+def key(ob):
+    return tuple(sorted(ob.items()))
+
+
+def test_links(tmp_path):
+    rows = randomLinks(1)
+    linkSnapshot.importLinks(rows, str(tmp_path))
+    snapshot = linkSnapshot.LinkSnapshot(str(tmp_path))
+
+    assert snapshot.sample(10) == rows[:10]
+    for nodes in (NODES[:1], NODES[-3:], ['http://example.org/missing', NODES[5]], []):
+        expected = [ob for ob in rows if ob['source'] in nodes or ob['target'] in nodes]
+        assert sorted(map(key, snapshot.links(nodes))) == sorted(map(key, expected))
+
+
+def test_reimport(tmp_path, monkeypatch):
+    monkeypatch.setenv('SNAPSHOT_DIR', str(tmp_path))
+    linkSnapshot.importLinks(randomLinks(1), str(tmp_path / 'test'))
+    first = linkSnapshot.getSnapshot('test')
+    assert linkSnapshot.getSnapshot('test') is first
+
+    rows = randomLinks(2, m=50)
+    for _ in range(3):
+        linkSnapshot.importLinks(rows, str(tmp_path / 'test'))
+    second = linkSnapshot.getSnapshot('test')
+    assert second is not first and len(second) == 50
+    assert second.sample(50) == rows
+    #   the old links remain readable from the memory maps
+    assert len(first.sample(200)) == 200
+
+
+def test_invalid_names(tmp_path, monkeypatch):
+    monkeypatch.setenv('SNAPSHOT_DIR', str(tmp_path))
+    with pytest.raises(ValueError):
+        linkSnapshot.getSnapshot('..')
+    with pytest.raises(ValueError):
+        linkSnapshot.getSnapshot('missing')
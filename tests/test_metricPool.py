@@ -0,0 +1,92 @@
+'''
+Created on 18.10.2026
+# coding: utf-8
+'''
+
+import os
+
+import networkx as nx
+import numpy as np
+import pytest
+
+from compactGraph import CompactGraph
+import metricPool
+from metricPool import SharedGraph
+
+
+def sharedGraph(G: nx.DiGraph) -> SharedGraph:
+    '''
+    The networkx graph as the server builds it, nodes in the same order
+    '''
+    C = CompactGraph()
+    for n in G:
+        C.add_node(n)
+    for u, v, data in G.edges(data=True):
+        C.add_edge(u, v, data)
+    return SharedGraph.fromCompact(C)
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_metrics_match_networkx(seed):
+    G = nx.gnm_random_graph(200, 230, seed=seed, directed=True)
+    G.add_node('isolated')
+    Gu = G.to_undirected()
+    cc = list(nx.connected_components(Gu))
+
+    with sharedGraph(G) as shared:
+        metrics = metricPool.graphMetrics(shared.desc)
+        distances = metricPool.distances(shared.desc, 0)
+
+    assert metrics['diameter'] == nx.diameter(Gu.subgraph(max(cc, key=len)))
+    assert metrics['diameter_exact']
+    assert metrics['number_connected_components'] == len(cc)
+    assert metrics['number_of_nodes'] == G.number_of_nodes()
+    assert metrics['number_of_edges'] == G.number_of_edges()
+    assert distances == dict(nx.shortest_path_length(Gu, 0))
+
+
+def test_degrees_match_networkx():
+    G = nx.gnm_random_graph(100, 300, seed=1, directed=True)
+    for u, v in G.edges():
+        G[u][v]['weight'] = (u+v) % 3 + 1
+
+    degrees = metricPool.degrees(sharedGraph(G))
+    assert degrees['degree'] == [d for _, d in G.degree()]
+    assert degrees['in_degree_weighted'] == [d for _, d in G.in_degree(weight='weight')]
+    assert degrees['out_degree_weighted'] == [d for _, d in G.out_degree(weight='weight')]
+
+
+def test_pagerank_cache_overlap():
+    cache = metricPool.PageRankCache(maxsize=4, sample_size=16)
+    params = (0.85, ())
+    cache.set(list(range(1000)), params, np.full(1000, 1.0))
+    cache.set(list(range(2000, 3000)), params, np.full(1000, 2.0))
+
+    #   mostly the second graph, the new nodes start from the default
+    nodes = list(range(2100, 3100))
+    x = cache.get(nodes, params)
+    assert x[0] == 2.0 and x[-1] == 1.0/len(nodes)
+
+    assert cache.get(list(range(5000, 6000)), params) is None
+    assert cache.get(nodes, (0.5, ())) is None
+
+
+def test_pagerank_matches_networkx():
+    G = nx.gnm_random_graph(100, 300, seed=2, directed=True)
+    with sharedGraph(G) as shared:
+        x = metricPool.pagerank(shared.desc)
+        x_seeded = metricPool.pagerank(shared.desc, 0.85, [3], nstart=x)
+
+    assert x.tolist() == pytest.approx(list(nx.pagerank(G).values()), abs=1e-6)
+    expected = nx.pagerank(G, personalization={3: 1})
+    assert x_seeded.tolist() == pytest.approx([expected[n] for n in G], abs=1e-4)
+
+
+def test_pool_workers_not_forked_from_server():
+    pool = metricPool.MetricPool(max_workers=1)
+    try:
+        #   started by the fork server or spawned, the parent of a worker is not this process
+        if metricPool.START_METHOD == 'forkserver':
+            assert pool.submit(os.getppid).result() != os.getpid()
+    finally:
+        pool.shutdown()
@@ -0,0 +1,136 @@
+'''
+Created on 18.10.2026
+# coding: utf-8
+'''
+
+import json
+import logging
+
+import pytest
+
+from compactGraph import CompactGraph
+import instrumentation
+from networkbuilder import NetworkBuilder
+from queryParams import QueryParams
+
+
+@pytest.fixture(scope='module')
+def opts(endpoint, queries):
+    return QueryParams(endpoint=endpoint.url, **queries, limit=40, log_level=logging.WARNING)
+
+
+@pytest.fixture(scope='module')
+def nb():
+    return NetworkBuilder()
+
+
+def elements(result: dict):
+    nodes = dict((ob['data']['id'], ob['data']) for ob in result['elements']['nodes'])
+    edges = [ob['data'] for ob in result['elements']['edges']]
+    return nodes, edges
+
+
+def checkGraph(result: dict, limit: int):
+    nodes, edges = elements(result)
+    assert 0 < len(nodes) <= limit
+    assert all(e['source'] in nodes and e['target'] in nodes for e in edges)
+    assert all('pagerank' in n and 'degree' in n for n in nodes.values())
+    assert result['metrics']['number_of_nodes'] == len(nodes)
+    assert result['metrics']['number_of_edges'] == len(edges)
+    return nodes, edges
+
+
+def test_query_egocentric(nb, opts, data):
+    ego = data.ids[0]
+    result = nb.query(QueryParams(**{**opts.__dict__, 'id': ego}))
+    nodes, _ = checkGraph(result, opts.limit)
+    assert nodes[ego]['distance'] == 0
+    assert all(n.get('distance', 0) >= 0 for n in nodes.values())
+
+
+def test_query_sociocentric(nb, opts):
+    nodes, _ = checkGraph(nb.query(opts), opts.limit)
+    assert all('distance' not in n for n in nodes.values())
+
+    #   the nodes are added in the order of the rows, equal degrees may be densified differently
+    streamed = nb.query(QueryParams(**{**opts.__dict__, 'stream': True}))
+    checkGraph(streamed, opts.limit)
+
+
+def test_query_encoded(nb, opts, data):
+    ego_opts = QueryParams(**{**opts.__dict__, 'id': data.ids[1]})
+    result = nb.query(ego_opts)
+    encoded = nb.query(ego_opts, encoded=True)
+    assert isinstance(encoded, bytes)
+    decoded = json.loads(encoded)
+    assert elements(decoded)[0].keys() == elements(result)[0].keys()
+    assert decoded['metrics'] == pytest.approx(result['metrics'])
+
+
+def test_query_ego(nb, opts, data):
+    ego = data.ids[2]
+    result = nb.query_ego(QueryParams(**{**opts.__dict__, 'id': ego}))
+    nodes, _ = checkGraph(result, opts.limit)
+    assert ego in nodes
+
+
+def test_query_batch(nb, opts, data):
+    ids = data.ids[:3]
+    result = nb.query_batch(opts, ids)
+    assert list(result) == ids
+    for ego in ids:
+        nodes, _ = checkGraph(result[ego], opts.limit)
+        assert nodes[ego]['distance'] == 0
+
+    #   the same graphs as the single queries
+    single = nb.query(QueryParams(**{**opts.__dict__, 'id': ids[0]}))
+    assert set(elements(result[ids[0]])[0]) == set(elements(single)[0])
+
+    encoded = json.loads(nb.query_batch(opts, ids, encoded=True))
+    assert list(encoded) == ids
+    assert all(elements(encoded[ego])[0].keys() == elements(result[ego])[0].keys() for ego in ids)
+
+
+def test_query_batch_binary_rejected(nb, opts, data):
+    with pytest.raises(ValueError):
+        nb.query_batch(QueryParams(**{**opts.__dict__, 'format': NetworkBuilder.BINARY}), data.ids[:2])
+
+
+def test_query_stream_rows(nb, opts):
+    with instrumentation.request() as streamed:
+        nb.query(QueryParams(**{**opts.__dict__, 'stream': True}))
+    with instrumentation.request() as fetched:
+        nb.query(opts)
+    #   the result rows, also the repeated links merged into one edge
+    assert streamed.sizes['rows'] == fetched.sizes['rows']
+    assert streamed.sizes['rows'] > streamed.sizes['edges']
+
+
+def compactGraph(edges):
+    G = CompactGraph()
+    for u, v in edges:
+        G.add_edge(u, v)
+    return G
+
+
+def test_densify(nb):
+    #   a star of 20 leaves, with a chain hanging from one leaf, and two small components
+    edges = [('hub', 'leaf{}'.format(i)) for i in range(20)]
+    edges += [('leaf0', 'chain0')]+[('chain{}'.format(i), 'chain{}'.format(i+1)) for i in range(5)]
+    edges += [('a', 'b'), ('c', 'd'), ('d', 'e')]
+    G = compactGraph(edges)
+
+    nb.densifyGraph(G, QueryParams(endpoint='', nodes='', links='', limit=15, id='chain5'))
+    assert G.number_of_nodes() == 15
+    #   the ego is kept, the small components removed first
+    assert 'chain5' in G and 'hub' in G
+    assert not any(n in G for n in 'abcde')
+    assert all(G.nodes[i] in G and G.nodes[j] in G for i, j in zip(G.src, G.trg))
+
+
+def test_densify_small_graph(nb):
+    G = compactGraph([('a', 'b'), ('b', 'c'), ('x', 'y')])
+    nb.densifyGraph(G, QueryParams(endpoint='', nodes='', links='', limit=10))
+    assert G.number_of_nodes() == 5
+    nb.densifyGraph(G, QueryParams(endpoint='', nodes='', links='', limit=3))
+    assert G.nodes == ['a', 'b', 'c']
@@ -0,0 +1,102 @@
+'''
+Created on 18.10.2026
+# coding: utf-8
+'''
+
+import networkx as nx
+import numpy as np
+import pytest
+
+import networkfunctions as fnx
+
+
+def adjacency(G):
+    return nx.to_scipy_sparse_array(G, format='csr')
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_diameter_bounds_exact(seed):
+    G = nx.gnm_random_graph(80, 100+seed*5, seed=seed)
+    G = G.subgraph(max(nx.connected_components(G), key=len))
+    assert fnx.diameter_bounds(adjacency(G)) == (nx.diameter(G), nx.diameter(G))
+
+
+@pytest.mark.parametrize('G', [nx.path_graph(50), nx.cycle_graph(51), nx.grid_2d_graph(7, 9),
+                               nx.star_graph(10), nx.complete_graph(5), nx.balanced_tree(3, 4)])
+def test_diameter_bounds_special_graphs(G):
+    assert fnx.diameter_bounds(adjacency(G)) == (nx.diameter(G), nx.diameter(G))
+
+
+def test_diameter_bounds_small_graphs():
+    assert fnx.diameter_bounds(adjacency(nx.empty_graph(1))) == (0, 0)
+    assert fnx.diameter_bounds(adjacency(nx.path_graph(2))) == (1, 1)
+
+
+def test_diameter_bounds_time_budget():
+    #   without time for the iFUB iterations, the double sweep bounds contain the diameter
+    G = nx.grid_2d_graph(20, 20)
+    lower, upper = fnx.diameter_bounds(adjacency(G), time_budget=0)
+    assert lower <= nx.diameter(G) <= upper
+    assert lower < upper
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_diameter_bounds_time_budget_trees(seed):
+    G = nx.random_tree(300, seed=seed)
+    lower, upper = fnx.diameter_bounds(adjacency(G), time_budget=0)
+    assert lower <= nx.diameter(G) <= upper
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_pagerank_matches_networkx(seed):
+    G = nx.gnm_random_graph(60, 150, seed=seed, directed=True)
+    for u, v in G.edges():
+        #   also zero-weight links, the nodes with only those are dangling
+        G[u][v]['weight'] = (u*v+seed) % 4
+    src, trg, weight = zip(*G.edges(data='weight'))
+
+    x = fnx.pagerank_csr(G.number_of_nodes(), src, trg, weight, tol=1e-10, max_iter=1000)
+    expected = nx.pagerank(G, tol=1e-10, max_iter=1000)
+    assert x == pytest.approx([expected[v] for v in G.nodes()], abs=1e-8)
+
+    personalization = dict((v, 1.0 if v < 3 else 0.0) for v in G.nodes())
+    x = fnx.pagerank_csr(G.number_of_nodes(), src, trg, weight, personalization=list(personalization.values()),
+                         tol=1e-10, max_iter=1000)
+    expected = nx.pagerank(G, personalization=personalization, tol=1e-10, max_iter=1000)
+    assert x == pytest.approx([expected[v] for v in G.nodes()], abs=1e-8)
+
+
+def test_pagerank_zero_out_weight():
+    x = fnx.pagerank_csr(3, [0, 1], [1, 2], [0, 1])
+    G = nx.DiGraph()
+    G.add_weighted_edges_from([(0, 1, 0), (1, 2, 1)])
+    assert x == pytest.approx(list(nx.pagerank(G).values()), abs=1e-6)
+
+
+def remaining_degrees(n, src, trg, removed):
+    keep = np.ones(n, dtype=bool)
+    keep[list(removed)] = False
+    edges = keep[src] & keep[trg]
+    return np.bincount(src[edges], minlength=n)+np.bincount(trg[edges], minlength=n), keep
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_low_degree_peeling_matches_naive(seed):
+    rng = np.random.default_rng(seed)
+    n = 60
+    src, trg = rng.integers(0, n, 150), rng.integers(0, n, 150)
+    removed = fnx.low_degree_peeling(n, src, trg, 20, keep=7)
+
+    assert len(removed) == n-20
+    assert 7 not in removed and len(set(removed)) == len(removed)
+    #   each removed node has the minimum degree among the remaining nodes, like a naive peel
+    for k, v in enumerate(removed):
+        degree, keep = remaining_degrees(n, src, trg, removed[:k])
+        keep[7] = False
+        assert degree[v] == degree[keep].min()
+
+
+def test_low_degree_peeling_small_graph():
+    assert fnx.low_degree_peeling(3, [0, 1], [1, 2], 5) == []
+    #   the leaves first
+    assert sorted(fnx.low_degree_peeling(4, [0, 1, 2], [1, 2, 3], 2)) == [0, 3]
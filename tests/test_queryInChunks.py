@@ -0,0 +1,81 @@
+'''
+Created on 18.10.2026
+# coding: utf-8
+'''
+
+import re
+import threading
+import time
+import types
+
+import pytest
+
+import networkbuilder
+from networkbuilder import NetworkBuilder
+
+IDS = ['http://a/{}'.format(i) for i in range(10)]
+
+
+class FakeBuilder(NetworkBuilder):
+    '''
+    Answers the chunk queries with one row per id, the chunk of the failing id fails its first failures attempts
+    '''
+    CHUNK_SIZE = 3
+    CHUNK_THREADS = 2
+    CHUNK_RETRIES = 2
+
+    def __init__(self, failing: str = None, failures: int = 0) -> None:
+        super().__init__()
+        self.failing, self.failures = failing, failures
+        self.attempts = {}
+        self.running = self.max_running = 0
+        self.lock = threading.Lock()
+
+    def makeSparqlQuery(self, query, endpoint, customHttpHeaders=None, timeout=None):
+        ids = re.findall(r'<([^>]+)>', query)
+        with self.lock:
+            self.attempts[ids[0]] = self.attempts.get(ids[0], 0)+1
+            attempt = self.attempts[ids[0]]
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+        try:
+            time.sleep(0.01)
+            if self.failing in ids and attempt <= self.failures:
+                raise IOError('endpoint unavailable')
+            return [{'id': i} for i in ids]
+        finally:
+            with self.lock:
+                self.running -= 1
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    #   the backoff delays, without waiting
+    sleeps = []
+    monkeypatch.setattr(networkbuilder, 'time', types.SimpleNamespace(time=time.time, sleep=sleeps.append))
+    return sleeps
+
+
+def test_chunks_in_order(sleeps):
+    nb = FakeBuilder()
+    res = list(nb.queryInChunks('SELECT * { VALUES ?id { <ID_SET> } }', '<ID_SET>', IDS, 'http://localhost/sparql'))
+    assert [[ob['id'] for ob in chunk] for chunk in res] == [IDS[0:3], IDS[3:6], IDS[6:9], IDS[9:10]]
+    assert nb.max_running <= FakeBuilder.CHUNK_THREADS
+    assert not sleeps
+
+
+def test_retry_with_backoff(sleeps):
+    nb = FakeBuilder(failing=IDS[4], failures=2)
+    data = nb.getNodesForPeople('SELECT * { VALUES ?id { <ID_SET> } }', 'http://localhost/sparql', IDS)
+    assert [ob['id'] for ob in data] == IDS
+    assert nb.attempts[IDS[3]] == 3
+    assert sleeps == [0.5, 1.0]
+
+
+def test_failed_chunk_skipped(sleeps):
+    nb = FakeBuilder(failing=IDS[4], failures=3)
+    data = nb.getNodesForPeople('SELECT * { VALUES ?id { <ID_SET> } }', 'http://localhost/sparql', IDS)
+    #   the other chunks are merged in order
+    assert [ob['id'] for ob in data] == IDS[0:3]+IDS[6:10]
+    assert nb.attempts[IDS[3]] == FakeBuilder.CHUNK_RETRIES+1
+    assert sleeps == [0.5, 1.0]
@@ -0,0 +1,21 @@
+'''
+Created on 18.10.2026
+# coding: utf-8
+'''
+
+import pytest
+
+from queryParams import QueryParams
+
+
+def test_bool_parameters():
+    opts = QueryParams(endpoint='', nodes='', links='', stream='false', timings='1',
+                       removeMultipleLinks='0', personalized_pagerank='true')
+    assert (opts.stream, opts.timings, opts.removeMultipleLinks, opts.personalized_pagerank) == (False, True, False, True)
+
+
+def test_compact_ids():
+    assert QueryParams(endpoint='', nodes='', links='', compact_ids='index').compact_ids == 'index'
+    assert QueryParams(endpoint='', nodes='', links='', compact_ids='').compact_ids is None
+    with pytest.raises(ValueError):
+        QueryParams(endpoint='', nodes='', links='', compact_ids='short')
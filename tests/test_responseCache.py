@@ -0,0 +1,46 @@
+'''
+Created on 18.10.2026
+# coding: utf-8
+'''
+
+import os
+
+from responseCache import ResponseCache
+
+
+def test_lru_and_ttl(monkeypatch):
+    cache = ResponseCache(maxsize=2, ttl=60)
+    a = cache.set('a', 'A', 'text/plain')
+    cache.set('b', b'B', 'text/plain')
+    assert cache.get('a') is a and a.body == b'A'
+    cache.set('c', b'C', 'text/plain')
+    #   b was the least recently used
+    assert cache.get('b') is None and len(cache) == 2
+
+    now = a.created
+    monkeypatch.setattr('responseCache.time.time', lambda: now+61)
+    assert cache.get('a') is None
+
+
+def test_etag_by_body():
+    cache = ResponseCache()
+    assert cache.set('a', b'x', 'text/plain').etag == cache.set('b', b'x', 'text/plain').etag
+    assert cache.set('a', b'x', 'text/plain').etag != cache.set('a', b'y', 'text/plain').etag
+
+
+def test_byte_bounds():
+    cache = ResponseCache(maxsize=100, max_bytes=10000, max_entry_bytes=4000)
+    #   not cached, but returned for the response
+    large = cache.set('large', b'x'*4001, 'text/plain')
+    assert large.body and cache.get('large') is None
+
+    for i in range(4):
+        cache.set(str(i), os.urandom(3000), 'text/plain')
+    assert [cache.get(str(i)) is not None for i in range(4)] == [False, True, True, True]
+    assert cache.nbytes() == 9000
+
+    #   the compressed variants count towards the bound
+    entry = cache.get('3')
+    assert cache.encode(entry, 'gzip') == entry.encoded['gzip']
+    assert cache.nbytes() <= 10000
+    assert cache.get('1') is None and cache.get('3') is entry
@@ -0,0 +1,128 @@
+'''
+Created on 18.10.2026
+# coding: utf-8
+'''
+
+import logging
+import time
+
+import pytest
+
+from app import app, routes
+import responseCache
+
+
+@pytest.fixture(scope='module')
+def params(endpoint, queries):
+    return {'endpoint': endpoint.url,
+            **queries,
+            'limit': 30,
+            'log_level': logging.WARNING}
+
+
+@pytest.fixture
+def client():
+    routes.response_cache.clear()
+    return app.test_client()
+
+
+def test_query_batch_post(client, params, data):
+    ids = data.ids[:3]
+    res = client.post('/query_batch', json={**params, 'ids': ids})
+    assert res.status_code == 200
+    assert list(res.get_json()) == ids
+
+    res = client.post('/query_batch', json={**params, 'ids': ' '.join(ids[:2])})
+    assert list(res.get_json()) == ids[:2]
+
+
+def test_query_batch_get(client, params, data):
+    ids = data.ids[:3]
+    res = client.get('/query_batch', query_string={**params, 'ids': ['{} {}'.format(*ids[:2]), ids[2]]})
+    assert res.status_code == 200
+    result = res.get_json()
+    assert list(result) == ids
+    assert all(result[ego]['elements']['nodes'] for ego in ids)
+
+
+def test_query_batch_binary_rejected(client, params, data):
+    res = client.post('/query_batch', json={**params, 'ids': data.ids[:2], 'format': 'binary'})
+    assert res.status_code == 403
+    assert b'not supported' in res.data
+
+
+def test_metrics_route(client, params, data):
+    client.post('/query_batch', json={**params, 'ids': data.ids[:1]})
+    res = client.get('/metrics')
+    assert res.status_code == 200
+    assert 'sparql2graph_request_seconds_count{route="queryGraphBatch"}' in res.get_data(as_text=True)
+
+
+def test_query_get(client, params, data):
+    res = client.get('/query', query_string={**params, 'id': data.ids[0]})
+    assert res.status_code == 200
+    assert res.get_json()['elements']['nodes']
+
+    res = client.get('/graphml', query_string={**params, 'id': data.ids[0]})
+    assert res.status_code == 200
+    assert res.get_data(as_text=True).startswith('<graphml')
+
+
+def test_query_etag(client, params, data):
+    query = {**params, 'id': data.ids[0]}
+    res = client.get('/query', query_string=query)
+    etag = res.headers['ETag']
+    assert etag
+
+    res = client.get('/query', query_string=query, headers={'If-None-Match': etag})
+    assert res.status_code == 304
+    assert not res.data
+
+    res = client.get('/query', query_string=query, headers={'If-None-Match': '"other"'})
+    assert res.status_code == 200 and res.headers['ETag'] == etag
+
+    #   only conditional GET requests are answered with 304
+    res = client.post('/query', json=query, headers={'If-None-Match': etag})
+    assert res.status_code == 200
+
+
+def test_query_response_cache(client, params, data, monkeypatch):
+    calls = []
+    query = routes.nb.query
+
+    def countingQuery(*args, **kwargs):
+        calls.append(args)
+        return query(*args, **kwargs)
+    monkeypatch.setattr(routes.nb, 'query', countingQuery)
+
+    body = {**params, 'id': data.ids[1]}
+    first = client.post('/query', json=body)
+    second = client.post('/query', json=body)
+    assert len(calls) == 1
+    assert first.data == second.data
+
+    #   an expired entry is computed again
+    monkeypatch.setattr(routes.response_cache, 'ttl', 60)
+    now = time.time()
+    monkeypatch.setattr(responseCache.time, 'time', lambda: now+120)
+    third = client.post('/query', json=body)
+    assert len(calls) == 2
+    #   pagerank is warm-started from the first result, compare the nodes
+    ids = lambda res: [n['data']['id'] for n in res.get_json()['elements']['nodes']]
+    assert ids(third) == ids(first)
+
+
+def test_query_unknown_format(client, params, data):
+    #   unknown formats are answered with cytoscape JSON
+    res = client.post('/query', json={**params, 'id': data.ids[0], 'format': 'json'})
+    assert res.status_code == 200
+    assert res.get_json()['elements']['nodes']
+
+
+def test_query_timings_not_cached(client, params, data):
+    body = {**params, 'id': data.ids[0], 'timings': True}
+    first = client.post('/query', json=body).get_json()['metrics']
+    second = client.post('/query', json=body).get_json()['metrics']
+    assert 'fetch' in first['timings']
+    assert first['timings'] != second['timings']
+    assert len(routes.response_cache) == 0
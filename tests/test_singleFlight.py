@@ -0,0 +1,78 @@
+'''
+Created on 18.10.2026
+# coding: utf-8
+'''
+
+from concurrent.futures import ThreadPoolExecutor
+import threading
+import time
+
+import pytest
+
+from singleFlight import SingleFlight
+
+THREADS = 8
+
+
+def run_concurrently(flight: SingleFlight, fn):
+    '''
+    Call fn through flight from THREADS threads, fn returns only after all the calls are waiting for it
+    '''
+    release = threading.Event()
+    calls = []
+
+    def call():
+        calls.append(threading.get_ident())
+        release.wait(10)
+        return fn()
+
+    def waiters():
+        inflight = flight._SingleFlight__calls.get('key')
+        return inflight.waiters if inflight is not None else 0
+
+    with ThreadPoolExecutor(max_workers=THREADS) as executor:
+        futures = [executor.submit(flight.do, 'key', call) for _ in range(THREADS)]
+        deadline = time.time()+10
+        while waiters() < THREADS-1 and time.time() < deadline:
+            time.sleep(0.01)
+        release.set()
+        outcomes = []
+        for f in futures:
+            try:
+                outcomes.append(f.result())
+            except Exception as e:
+                outcomes.append(e)
+    return calls, outcomes
+
+
+def test_runs_once_for_concurrent_calls():
+    flight = SingleFlight()
+    result = object()
+    calls, outcomes = run_concurrently(flight, lambda: result)
+
+    assert len(calls) == 1
+    assert all(r is result for r in outcomes)
+    assert len(flight) == 0
+
+
+def test_exception_reaches_all_waiters():
+    flight = SingleFlight()
+
+    def fail():
+        raise ValueError('failed')
+
+    calls, outcomes = run_concurrently(flight, fail)
+    assert len(calls) == 1
+    assert len(outcomes) == THREADS
+    assert all(isinstance(e, ValueError) for e in outcomes)
+
+    #   the key is released, a later call runs again
+    assert flight.do('key', lambda: 1) == 1
+
+
+def test_different_keys_run_separately():
+    flight = SingleFlight()
+    assert flight.do('a', lambda: 1) == 1
+    assert flight.do('b', lambda: 2) == 2
+    with pytest.raises(KeyError):
+        flight.do('a', lambda: {}['x'])
@@ -0,0 +1,113 @@
+'''
+Created on 18.10.2026
+# coding: utf-8
+'''
+
+import json
+import os
+import subprocess
+import sys
+import zlib
+
+import pytest
+
+import sparqlCache
+from sparqlCache import SparqlCache
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+ENDPOINT = 'http://localhost:3030/ds/sparql'
+OTHER = 'http://example.org/sparql'
+
+
+def result(i: int, size: int = 10) -> dict:
+    #   incompressible values, for predictable sizes
+    return {'results': {'bindings': [{'id': {'value': os.urandom(size).hex()}, 'i': {'value': i}}]}}
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(sparqlCache.time, 'time', lambda: now[0])
+    return now
+
+
+def test_get_set(tmp_path):
+    cache = SparqlCache(str(tmp_path/'cache.sqlite3'))
+    res = result(1)
+    assert cache.get(ENDPOINT, 'q') is None
+    cache.set(ENDPOINT, 'q', None, res)
+    assert cache.get(ENDPOINT, 'q') == res
+    assert cache.get(ENDPOINT, 'q', {'Authorization': 'x'}) is None
+    assert cache.get(OTHER, 'q') is None
+
+    fetched = []
+    assert cache.cached(ENDPOINT, 'q', None, lambda: fetched.append(1)) == res
+    assert not fetched
+
+
+def test_ttl(tmp_path, clock):
+    cache = SparqlCache(str(tmp_path/'cache.sqlite3'), ttl=60, endpoint_ttl={OTHER: 3600})
+    cache.set(ENDPOINT, 'q', None, result(1))
+    cache.set(OTHER, 'q', None, result(2))
+
+    clock[0] += 59
+    assert cache.get(ENDPOINT, 'q') is not None
+    clock[0] += 2
+    #   expired by the default time to live, but not by the endpoint's own
+    assert cache.get(ENDPOINT, 'q') is None
+    assert cache.get(OTHER, 'q')['results']['bindings'][0]['i']['value'] == 2
+    clock[0] += 3600
+    assert cache.get(OTHER, 'q') is None
+
+
+def test_size_eviction(tmp_path, clock):
+    size = len(zlib.compress(json.dumps(result(0, 1500)).encode('utf-8')))
+    cache = SparqlCache(str(tmp_path/'cache.sqlite3'), max_size=int(3.5*size))
+    for i in range(3):
+        cache.set(ENDPOINT, str(i), None, result(i, 1500))
+        clock[0] += 1
+    #   the least recently read is evicted first
+    assert cache.get(ENDPOINT, '0') is not None
+    clock[0] += 1
+    cache.set(ENDPOINT, '3', None, result(3, 1500))
+
+    assert [cache.get(ENDPOINT, str(i)) is not None for i in range(4)] == [True, False, True, True]
+
+    #   a result larger than the whole cache is not stored
+    cache.set(ENDPOINT, 'large', None, result(4, 10000))
+    assert cache.get(ENDPOINT, 'large') is None
+    assert cache.get(ENDPOINT, '3') is not None
+
+
+SCRIPT = '''
+import json, sys
+from sparqlCache import SparqlCache
+cache = SparqlCache(sys.argv[1])
+if sys.argv[2] == 'set':
+    for i in range(50):
+        cache.set('{endpoint}', sys.argv[3]+str(i), None, {{'results': {{'bindings': [{{'i': i}}]}}}})
+else:
+    print(json.dumps(cache.get('{endpoint}', sys.argv[3])))
+'''.format(endpoint=ENDPOINT)
+
+
+def test_shared_by_processes(tmp_path):
+    path = str(tmp_path/'cache.sqlite3')
+
+    def run(*args):
+        return subprocess.Popen([sys.executable, '-c', SCRIPT, path]+list(args), cwd=ROOT,
+                                env=dict(os.environ, PYTHONPATH=ROOT), stdout=subprocess.PIPE)
+
+    #   concurrent writers to the same file
+    writers = [run('set', 'a'), run('set', 'b')]
+    assert all(p.wait(60) == 0 for p in writers)
+
+    cache = SparqlCache(path)
+    assert cache.get(ENDPOINT, 'a49') == {'results': {'bindings': [{'i': 49}]}}
+    assert cache.get(ENDPOINT, 'b0') == {'results': {'bindings': [{'i': 0}]}}
+
+    cache.set(ENDPOINT, 'c', None, result(3))
+    reader = run('get', 'c')
+    out, _ = reader.communicate(timeout=60)
+    assert out.strip() and out.strip() != b'null'
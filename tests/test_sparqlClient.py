@@ -0,0 +1,57 @@
+'''
+Created on 18.10.2026
+# coding: utf-8
+'''
+
+from concurrent.futures import ThreadPoolExecutor
+import json
+
+import pytest
+
+from sparqlClient import SparqlClient, iterBindings
+
+RESULT = {'head': {'vars': ['source', 'target']},
+          'results': {'bindings': [{'source': {'type': 'uri', 'value': 'http://a/{}'.format(i)},
+                                    'target': {'type': 'literal', 'value': 'ä "{}" ]}}'.format('x'*i)}}
+                                   for i in range(0, 5000, 250)]}}
+
+
+def chunked(data: bytes, size: int):
+    return (data[i:i+size] for i in range(0, len(data), size))
+
+
+@pytest.mark.parametrize('size', [1, 7, 100, 2**16])
+def test_iterBindings_chunks(size):
+    data = json.dumps(RESULT, ensure_ascii=False).encode('utf-8')
+    assert list(iterBindings(chunked(data, size))) == RESULT['results']['bindings']
+
+
+def test_iterBindings_large_binding():
+    result = {'results': {'bindings': [{'a': {'value': 'y'*2**20}}, {'b': {'value': 'z'}}]}}
+    data = json.dumps(result).encode('utf-8')
+    assert list(iterBindings(chunked(data, 100))) == result['results']['bindings']
+
+
+def test_iterBindings_truncated():
+    data = json.dumps(RESULT).encode('utf-8')
+    with pytest.raises(ValueError):
+        list(iterBindings(chunked(data[:-100], 100)))
+
+
+
+def test_session_shared_by_threads():
+    client = SparqlClient(pool_size=3)
+    main = client.session('http://localhost:3030/ds/sparql')
+    assert client.session('http://localhost:3030/other') is main
+    assert client.session('http://example.org/sparql') is not main
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        other = executor.submit(client.session, 'http://localhost:3030/ds/sparql').result()
+    assert other is main
+
+    #   a bounded pool, waiting for a free connection
+    adapter = main.get_adapter('http://localhost:3030/ds/sparql')
+    assert adapter._pool_maxsize == 3 and adapter._pool_block
+
+    client.close()
+    assert client.session('http://localhost:3030/ds/sparql') is not main